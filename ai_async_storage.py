@@ -0,0 +1,364 @@
+import asyncio
+import json
+import os
+from tempfile import NamedTemporaryFile
+
+from .ai_codec import AiCodec
+from .ai_storage import AiDiskStorage
+from .ai_utils import AiUtils
+
+
+###################################
+# CLASS AiAsyncStorage
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiAsyncStorage:
+    """
+    Classe base para interagir com o storage de forma assíncrona (asyncio).
+
+    Todas as operações passam por um semáforo, que limita a quantidade de
+    requisições simultâneas (max_concurrency). Os caminhos seguem o mesmo
+    formato do AiStorage, então os nomes retornados pelo list_path síncrono
+    podem ser lidos diretamente.
+    """
+    def __init__(self, config: dict):
+        """
+        Inicializa a classe AiAsyncStorage.
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                host (str): path (quando for DISK) e zone (Quando for S3)
+                base_path (str): path (quando for DISK) e bucket e path (Quando for S3)
+                max_concurrency (int, optional): operações simultâneas. DEFAULT: 64
+                compression (str, optional): (NONE/GZIP/ZSTD) compressão do conteúdo no save. DEFAULT: NONE
+                decompress (bool, optional): descomprime (gzip/zstd) o conteúdo lido. DEFAULT: True
+        """
+        AiUtils.validate_config(config, ["host", "base_path"])
+        self.host = "" if config["host"] is None else config["host"]
+        self.base_path = "" if config["base_path"] is None else config["base_path"]
+        self.max_concurrency = config.get("max_concurrency") or 64
+        self.compression = AiCodec.normalize(config.get("compression"))
+        self.compression_level = config.get("compression_level")
+        self.decompress = config.get("decompress") if config.get("decompress") is not None else True
+        self._semaphore = None
+
+    @staticmethod
+    def get_instance(config: dict):
+        """
+        retorna a instância pelo tipo solicitado
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                host (str): path (quando for DISK) e zone (Quando for S3)
+                base_path (str): path (quando for DISK) e bucket e path (Quando for S3)
+                type (str): (DISK/AWS) DEFAULT: DISK
+        """
+        if ((config["type"].upper() if config.get("type") is not None else "DISK") == "AWS"):
+            return AiAsyncAwsStorage(config)
+        else:
+            return AiAsyncDiskStorage(config)
+
+    def get_base_path(self):
+        return self.base_path
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Criado sob demanda para ficar associado ao event loop em execução
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def save(self, file_path: str, file_name: str, content: str, metadata: dict = None) -> bool:
+        """
+        Salva um conteúdo (e o .metadata, quando informado) no caminho especificado.
+
+        Returns:
+            bool: True se a gravação for bem-sucedida, False caso contrário.
+        """
+        raise Exception("method not implemented.")
+
+    async def read(self, file_path: str, file_name: str) -> bytes:
+        """
+        Lê todo o conteúdo do arquivo.
+
+        Returns:
+            bytes: Conteúdo do arquivo ou None em caso de erro.
+        """
+        raise Exception("method not implemented.")
+
+    async def list_path(self, path: str, prefix: str = "", type: str = "") -> list:
+        """
+        Lista todos os arquivos e subpastas (prefixos) dentro de uma path, no mesmo formato do AiStorage.list_path.
+        """
+        raise Exception("method not implemented.")
+
+    async def download(self, file_path: str, file_name: str) -> str:
+        """
+        Download do arquivo para um arquivo temporário.
+
+        Returns:
+            str: Caminho do arquivo temporário ou None em caso de erro.
+        """
+        raise Exception("method not implemented.")
+
+    async def read_text(self, file_path: str, file_name: str, encoding: str = "utf-8") -> str:
+        """
+        Lê o arquivo como texto.
+
+        Returns:
+            str: Conteúdo do arquivo ou None em caso de erro.
+        """
+        content = await self.read(file_path, file_name)
+        if content is None:
+            return None
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            print(f"Erro: Não foi possível decodificar o arquivo usando a codificação '{encoding}'.")
+            return None
+
+    async def read_many(self, items: list) -> list:
+        """
+        Lê vários arquivos de forma concorrente (limitada pelo semáforo).
+
+        Args:
+            items (list): Lista de dict com file_path e file_name.
+
+        Returns:
+            list: Resultado por item, na mesma ordem: file_path, file_name, content (bytes) e error.
+        """
+        async def read_item(item):
+            try:
+                content = await self.read(item.get("file_path"), item["file_name"])
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "content": content,
+                        "error": None if content is not None else "not found"}
+            except Exception as e:
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "content": None, "error": str(e)}
+
+        return list(await asyncio.gather(*[read_item(item) for item in items]))
+
+    async def save_many(self, items: list) -> list:
+        """
+        Salva vários conteúdos de forma concorrente, com os mesmos itens do AiStorage.save_many.
+
+        Args:
+            items (list): Lista de dict com file_path, file_name, content e metadata (opcional).
+
+        Returns:
+            list: Resultado por item, na mesma ordem: file_path, file_name, success e error.
+        """
+        async def save_item(item):
+            try:
+                success = await self.save(item.get("file_path"), item["file_name"], item["content"], item.get("metadata"))
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "success": success, "error": None}
+            except Exception as e:
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "success": False, "error": str(e)}
+
+        return list(await asyncio.gather(*[save_item(item) for item in items]))
+
+    async def close(self):
+        """
+        Libera os recursos do cliente.
+        """
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+
+###################################
+# CLASS AiAsyncDiskStorage
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiAsyncDiskStorage(AiAsyncStorage):
+    """
+    Implementação assíncrona em disco, sobre o AiDiskStorage, para executar sem rede (ex: testes).
+    """
+    def __init__(self, config: dict):
+        """
+        Inicializa a classe AiAsyncDiskStorage.
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                host (str): path no disco
+                base_path (str): path2 no disco
+                type (str): DISK
+        """
+        super().__init__(config)
+        self.storage = AiDiskStorage(dict(config, type="DISK"))
+
+    # Override
+    async def save(self, file_path: str, file_name: str, content: str, metadata: dict = None) -> bool:
+        async with self._get_semaphore():
+            # O .metadata é gravado sem compressão pelo AiDiskStorage (mesmo formato do save síncrono)
+            return await asyncio.to_thread(self.storage.save, file_path, file_name, content, metadata)
+
+    # Override
+    async def read(self, file_path: str, file_name: str) -> bytes:
+        async with self._get_semaphore():
+            return await asyncio.to_thread(self.storage.read_bytes, file_path, file_name)
+
+    # Override
+    async def list_path(self, path: str, prefix: str = "", type: str = "") -> list:
+        async with self._get_semaphore():
+            return await asyncio.to_thread(self.storage.list_path, path, prefix, type)
+
+    # Override
+    async def download(self, file_path: str, file_name: str) -> str:
+        content = await self.read(file_path, file_name)
+        if content is None:
+            return None
+        base_p, ext = os.path.splitext(file_name)
+        with NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
+            temp_file.write(content)
+            return temp_file.name
+
+
+###################################
+# CLASS AiAsyncAwsStorage
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiAsyncAwsStorage(AiAsyncStorage):
+    """
+    Implementação assíncrona no S3 com o aiobotocore (pip install ai_databricks_package[aws-async]).
+    """
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, config: dict):
+        """
+        Inicializa a classe AiAsyncAwsStorage.
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                host (str): zone do S3
+                base_path (str): bucket
+                type (str): AWS
+                max_pool_connections (int, optional): conexões HTTP do cliente. DEFAULT: max_concurrency
+                max_attempts (int, optional): tentativas (retry adaptativo). DEFAULT: 10
+        """
+        super().__init__(config)
+        # Import tardio: o aiobotocore é opcional
+        from aiobotocore.config import AioConfig
+        from aiobotocore.session import get_session
+
+        self.region_name = "us-east-2" if config["host"] is None else config["host"]
+        self.client_config = AioConfig(max_pool_connections=config.get("max_pool_connections") or self.max_concurrency,
+                                       retries={"max_attempts": config.get("max_attempts") or 10, "mode": "adaptive"})
+        self.session = get_session()
+        self._client_context = None
+        self._client = None
+        self._client_lock = None
+
+    async def _get_client(self):
+        if self._client_lock is None:
+            self._client_lock = asyncio.Lock()
+        async with self._client_lock:
+            if self._client is None:
+                self._client_context = self.session.create_client("s3", region_name=self.region_name, config=self.client_config)
+                self._client = await self._client_context.__aenter__()
+        return self._client
+
+    def _get_object_name(self, file_path: str, file_name: str) -> str:
+        return AiUtils.sanitize_file_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
+
+    # Override
+    async def save(self, file_path: str, file_name: str, content: str, metadata: dict = None) -> bool:
+        object_name = self._get_object_name(file_path, file_name)
+        client = await self._get_client()
+        try:
+            async with self._get_semaphore():
+                params = {}
+                if self.compression != AiCodec.NONE:
+                    params = {"ContentEncoding": AiCodec.CONTENT_ENCODING[self.compression],
+                              "Metadata": {"ai-codec": self.compression}}
+                await client.put_object(Body=AiCodec.compress(content.encode('utf-8'), self.compression, self.compression_level),
+                                        Bucket=self.base_path, Key=object_name, **params)
+            if metadata is not None:
+                metadata_name = self._get_object_name(file_path, ".metadata/" + file_name + ".metadata")
+                async with self._get_semaphore():
+                    await client.put_object(Body=json.dumps(metadata).encode('utf-8'), Bucket=self.base_path, Key=metadata_name)
+            return True
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado durante o upload de '{object_name}': {e}")
+            return False
+
+    # Override
+    async def read(self, file_path: str, file_name: str) -> bytes:
+        object_name = self._get_object_name(file_path, file_name)
+        client = await self._get_client()
+        try:
+            async with self._get_semaphore():
+                response = await client.get_object(Bucket=self.base_path, Key=object_name)
+                async with response["Body"] as stream:
+                    content = await stream.read()
+            if not self.decompress:
+                return content
+            # Codec gravado no objeto (metadata ai-codec ou Content-Encoding)
+            return AiCodec.decompress(content, AiCodec.from_metadata(response.get("Metadata"), response.get("ContentEncoding")))
+        except Exception as e:
+            print(f"Erro ao acessar o bucket: {self.base_path}/{object_name}: {e}")
+            return None
+
+    # Override
+    async def list_path(self, path: str, prefix: str = "", type: str = "") -> list:
+        files = []
+        p = AiUtils.sanitize_file_path(((path + "/") if path is not None and path != "" else "") + prefix)
+        client = await self._get_client()
+        try:
+            async with self._get_semaphore():
+                paginator = client.get_paginator('list_objects_v2')
+                async for page in paginator.paginate(Bucket=self.base_path, Prefix=p, Delimiter="/"):
+                    if type != "PATH" and 'Contents' in page:
+                        for obj in page['Contents']:
+                            files.append({'name': obj['Key'], 'type': "FILE", 'size': obj.get('Size'),
+                                          'last_modified': obj['LastModified'].isoformat() if obj.get('LastModified') else None,
+                                          'etag': obj.get('ETag', '').strip('"')})
+                    if type != "FILE" and 'CommonPrefixes' in page:
+                        for prefix_data in page['CommonPrefixes']:
+                            files.append({'name': prefix_data['Prefix'].rstrip('/'), "type": "PATH"})
+            return files
+        except Exception as e:
+            print(f"Erro ao listar o bucket '{self.base_path}' ({p}): {e}")
+            return None
+
+    # Override
+    async def download(self, file_path: str, file_name: str) -> str:
+        object_name = self._get_object_name(file_path, file_name)
+        client = await self._get_client()
+        base_p, ext = os.path.splitext(file_name)
+        with NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
+            temp_file_path = temp_file.name
+        try:
+            async with self._get_semaphore():
+                response = await client.get_object(Bucket=self.base_path, Key=object_name)
+                async with response["Body"] as stream:
+                    with open(temp_file_path, "wb") as file:
+                        while True:
+                            chunk = await stream.read(AiAsyncAwsStorage.CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            file.write(chunk)
+            if self.decompress:
+                # Codec gravado no objeto (metadata ai-codec ou Content-Encoding), como no read
+                codec = AiCodec.from_metadata(response.get("Metadata"), response.get("ContentEncoding"))
+                await asyncio.to_thread(AiCodec.decompress_file, temp_file_path, codec)
+            return temp_file_path
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado durante o download de '{object_name}': {e}")
+            os.remove(temp_file_path)
+            return None
+
+    # Override
+    async def close(self):
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+            self._client_context = None
+            self._client = None
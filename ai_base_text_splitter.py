@@ -18,6 +18,9 @@ from .split_document import SplitDocument
 
 
 class AiBaseTextSplitter():
+    # Metadata reservado com a página real da origem (ex: PDF extraído página a página); o "page"
+    # do metadata do usuário (.metadata) não altera a numeração
+    SOURCE_PAGE = "_ai_source_page"
 
     def __init__(self,
                  context_size: int = 0,
@@ -96,7 +99,13 @@ class AiBaseTextSplitter():
                     content_to_embed=document.page_content,
                     metadata=document.metadata
                 )
-            if not document.metadata.get("start_index") or document.metadata["start_index"] == 0:
+            source_page = document.metadata.get(AiBaseTextSplitter.SOURCE_PAGE)
+            if source_page is not None:
+                # Página real informada pela origem (ex: PDF extraído página a página)
+                if source_page != page:
+                    position = 1
+                    page = source_page
+            elif not document.metadata.get("start_index") or document.metadata["start_index"] == 0:
                 position = 1
                 page += 1
 
@@ -104,6 +113,10 @@ class AiBaseTextSplitter():
 
             position += 1
 
+        # Removida só ao final: documentos do mesmo segmento podem compartilhar o dict de metadata
+        for document in new_list:
+            document.metadata.pop(AiBaseTextSplitter.SOURCE_PAGE, None)
+
         return new_list
 
     def _format_document(self, document: Document, page: int, position: int) -> Document:
@@ -0,0 +1,343 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from tempfile import NamedTemporaryFile
+
+from .ai_codec import AiCodec
+from .ai_storage import AiStorage
+from .ai_utils import AiUtils
+
+
+###################################
+# CLASS AiCachedStorage
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiCachedStorage(AiStorage):
+    """
+    Cache local de leitura (read-through) sobre qualquer AiStorage.
+
+    O conteúdo fica em blobs endereçados pelo sha256 (arquivos iguais ocupam um
+    único blob) e cada chave aponta para o blob e o ETag da versão baixada.
+    Toda leitura revalida o ETag com uma leitura condicional (If-None-Match);
+    quando o arquivo não mudou, o conteúdo vem do disco local. As gravações são
+    atômicas (arquivo temporário + os.replace), então vários processos podem
+    compartilhar a mesma pasta de cache. Acima do tamanho máximo, os blobs menos
+    usados recentemente (LRU, pela data de modificação) são removidos.
+
+    As escritas e listagens são delegadas ao storage original, assim como os
+    atributos de configuração (host, base_path, compression, metrics, ...),
+    lidos do storage original pelo __getattr__.
+    """
+    BLOB_PATH = "blobs"
+    ENTRY_PATH = "entries"
+    TEMP_PATH = "tmp"
+    # Após a limpeza o cache fica em 90% do tamanho máximo, para não limpar a cada download
+    EVICTION_TARGET = 0.9
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, storage: AiStorage, config: dict):
+        """
+        Inicializa a classe AiCachedStorage.
+
+        Args:
+            storage (AiStorage): Storage original (DISK/AWS).
+            config (dict): Configurações do cache
+                path (str): pasta local do cache
+                max_size_mb (int, optional): tamanho máximo do cache em MB. DEFAULT: 10240
+        """
+        AiUtils.validate_config(config, ["path"])
+        # A configuração já foi validada pelo storage original (ver __getattr__)
+        self.storage = storage
+        self.path = config["path"]
+        self.max_size = int(config.get("max_size_mb") or 10240) * 1024 * 1024
+
+        for folder in (AiCachedStorage.BLOB_PATH, AiCachedStorage.ENTRY_PATH, AiCachedStorage.TEMP_PATH):
+            os.makedirs(os.path.join(self.path, folder), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bytes_downloaded": 0, "evicted": 0}
+        self._current_size = self._scan_size()
+
+    def __getattr__(self, name: str):
+        """
+        Atributos que o cache não define (configuração, métricas, locks) vêm do storage original.
+        """
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    # Override
+    def _get_executor(self):
+        return self.storage._get_executor()
+
+    # Override
+    def get_uri(self, path: str) -> str:
+        return self.storage.get_uri(path)
+
+    # Override
+    def save(self, file_path: str, file_name: str, content: str, metadata: dict = None):
+        return self.storage.save(file_path, file_name, content, metadata)
+
+    # Override
+    def save_many(self, items: list) -> list:
+        return self.storage.save_many(items)
+
+    # Override
+    def save_by_file(self, file_path: str, file_name: str, local_path: str, metadata: dict = None):
+        return self.storage.save_by_file(file_path, file_name, local_path, metadata)
+
+    # Override
+    def list_path(self, path: str, prefix: str = "", type: str = "") -> list:
+        return self.storage.list_path(path, prefix, type)
+
+    # Override
+    def list_tree(self, path: str, refresh: bool = False) -> dict:
+        return self.storage.list_tree(path, refresh)
+
+    # Override
+    def invalidate_listing(self, path: str = None):
+        self.storage.invalidate_listing(path)
+
+    # Override
+    def exists(self, file_path: str, file_name: str) -> bool:
+        return self.storage.exists(file_path, file_name)
+
+    # Override
+    def save_metadata_index(self, file_path: str, entries: dict) -> bool:
+        return self.storage.save_metadata_index(file_path, entries)
+
+    # Override
+    def load_metadata_index(self, file_path: str) -> dict:
+        return self.storage.load_metadata_index(file_path)
+
+    # Override
+    def open_stream_if_changed(self, file_path: str, file_name: str, etag: str = None) -> dict:
+        return self.storage.open_stream_if_changed(file_path, file_name, etag)
+
+    # Override
+    def open_stream(self, file_path: str, file_name: str, seekable: bool = False):
+        """
+        Abre a cópia local do arquivo (sempre com seek), baixando-a quando necessário.
+        O blob guarda o conteúdo como está no storage; a descompressão é feita na leitura.
+        """
+        for _ in range(2):
+            cached = self._get_cached_blob(file_path, file_name)
+            if cached is None:
+                return None
+            try:
+                return self._decode_stream(open(cached[0], "rb"), cached[1], seekable)
+            except FileNotFoundError:
+                # Blob removido por outro processo (LRU) entre a validação e a abertura
+                continue
+        return None
+
+    # Override
+    def download_file(self, file_path: str, file_name: str, size: int = None):
+        """
+        Copia o arquivo do cache para um arquivo temporário (o chamador pode removê-lo; size não é usado).
+
+        Returns:
+            str: Caminho do arquivo temporário ou None em caso de erro.
+        """
+        stream = self.open_stream(file_path, file_name)
+        if stream is None:
+            return None
+        try:
+            base_p, ext = os.path.splitext(file_name)
+            with NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
+                shutil.copyfileobj(stream, temp_file, AiCachedStorage.CHUNK_SIZE)
+                return temp_file.name
+        finally:
+            stream.close()
+
+    def download_fileobj(self, file_path: str, file_name: str, encoding: str = "utf-8"):
+        return self.read_text(file_path, file_name, encoding)
+
+    def get_cached_path(self, file_path: str, file_name: str) -> str:
+        """
+        Retorna o caminho local do blob com a versão atual do arquivo.
+
+        Returns:
+            str: Caminho do blob ou None em caso de erro.
+        """
+        cached = self._get_cached_blob(file_path, file_name)
+        return cached[0] if cached is not None else None
+
+    def _get_cached_blob(self, file_path: str, file_name: str) -> tuple:
+        """
+        Retorna o caminho do blob com a versão atual do arquivo e o codec com que ele foi gravado
+        no storage original (o blob guarda o conteúdo como está no storage).
+
+        Returns:
+            tuple: Caminho do blob e codec ou None em caso de erro.
+        """
+        key = AiUtils.sanitize_file_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
+        entry = self._load_entry(key)
+        blob_path = self._get_blob_path(entry["sha256"]) if entry is not None else None
+        # Entradas sem o codec (versões anteriores do cache) são baixadas de novo
+        if blob_path is not None and (not os.path.exists(blob_path) or "codec" not in entry):
+            entry = None
+
+        response = self.storage.open_stream_if_changed(file_path, file_name, entry["etag"] if entry is not None else None)
+        if response is None:
+            return None
+
+        if not response["modified"]:
+            self._touch(blob_path)
+            with self._lock:
+                self._stats["hits"] += 1
+            return blob_path, entry["codec"]
+
+        stream = response["stream"]
+        try:
+            sha256, size = self._write_blob(stream)
+        finally:
+            stream.close()
+
+        codec = response.get("codec") or AiCodec.NONE
+        self._save_entry(key, {"key": key, "etag": response["etag"], "sha256": sha256, "size": size, "codec": codec})
+        with self._lock:
+            self._stats["misses"] += 1
+            self._stats["bytes_downloaded"] += size
+
+        blob_path = self._get_blob_path(sha256)
+        # O blob recém gravado é preservado, mesmo que sozinho passe do tamanho alvo
+        self._evict(keep=blob_path)
+        return blob_path, codec
+
+    def get_stats(self) -> dict:
+        """
+        Retorna hits, misses, hit_rate, bytes baixados, blobs removidos e tamanho atual do cache.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._current_size
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] / total) if total > 0 else 0.0
+        return stats
+
+    def clear(self):
+        """
+        Remove todo o conteúdo do cache.
+        """
+        with self._lock:
+            for folder in (AiCachedStorage.BLOB_PATH, AiCachedStorage.ENTRY_PATH):
+                shutil.rmtree(os.path.join(self.path, folder), ignore_errors=True)
+                os.makedirs(os.path.join(self.path, folder), exist_ok=True)
+            self._current_size = 0
+
+    def _get_blob_path(self, sha256: str) -> str:
+        return os.path.join(self.path, AiCachedStorage.BLOB_PATH, sha256[:2], sha256)
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.path, AiCachedStorage.ENTRY_PATH,
+                            hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _new_temp_path(self) -> str:
+        return os.path.join(self.path, AiCachedStorage.TEMP_PATH, uuid.uuid4().hex)
+
+    def _load_entry(self, key: str) -> dict:
+        try:
+            with open(self._get_entry_path(key), "r", encoding="utf-8") as file:
+                entry = json.load(file)
+            return entry if entry.get("key") == key else None
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save_entry(self, key: str, entry: dict):
+        temp_path = self._new_temp_path()
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(temp_path, self._get_entry_path(key))
+
+    def _write_blob(self, stream) -> tuple:
+        """
+        Grava o stream em um arquivo temporário calculando o sha256 e move para o blob.
+
+        Returns:
+            tuple: sha256 e tamanho do conteúdo.
+        """
+        temp_path = self._new_temp_path()
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as file:
+                while True:
+                    chunk = stream.read(AiCachedStorage.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    file.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            blob_path = self._get_blob_path(sha256)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            exists = os.path.exists(blob_path)
+            # os.replace é atômico: leitores veem o blob completo ou nenhum
+            os.replace(temp_path, blob_path)
+            if not exists:
+                with self._lock:
+                    self._current_size += size
+            return sha256, size
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _touch(self, blob_path: str):
+        try:
+            os.utime(blob_path, None)
+        except FileNotFoundError:
+            pass
+
+    def _list_blobs(self) -> list:
+        blobs = []
+        root = os.path.join(self.path, AiCachedStorage.BLOB_PATH)
+        for folder in os.scandir(root):
+            if not folder.is_dir():
+                continue
+            for blob in os.scandir(folder.path):
+                try:
+                    stat = blob.stat()
+                    blobs.append((stat.st_mtime_ns, stat.st_size, blob.path))
+                except FileNotFoundError:
+                    continue
+        return blobs
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._list_blobs())
+
+    def _evict(self, keep: str = None):
+        """
+        Remove os blobs menos usados recentemente até o cache voltar ao tamanho alvo.
+
+        Args:
+            keep (str, optional): Blob que não é removido (o que acabou de ser baixado); um
+                arquivo maior que o cache fica até a próxima limpeza, em vez de ser removido
+                antes da leitura.
+        """
+        with self._lock:
+            if self._current_size <= self.max_size:
+                return
+
+            # Recalcula a partir do disco, pois outros processos também gravam no cache
+            blobs = sorted(self._list_blobs())
+            current_size = sum(size for _, size, _ in blobs)
+            target = self.max_size * AiCachedStorage.EVICTION_TARGET
+            for _, size, blob_path in blobs:
+                if current_size <= target:
+                    break
+                if blob_path == keep:
+                    continue
+                try:
+                    os.remove(blob_path)
+                    current_size -= size
+                    self._stats["evicted"] += 1
+                except FileNotFoundError:
+                    continue
+            self._current_size = current_size
@@ -0,0 +1,208 @@
+import gzip
+import io
+import os
+import shutil
+import zlib
+
+
+###################################
+# CLASS AiCodec
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiCodec:
+    """
+    Compressão dos arquivos gravados no storage (gzip ou zstd).
+
+    Os arquivos mantêm o nome original e o codec usado na gravação define a
+    descompressão na leitura: no S3 (e no AiMemoryStorage) pela metadata ai-codec
+    ou pelo Content-Encoding do objeto; em disco, sem metadata por arquivo, pela
+    compressão configurada no storage, confirmada pelos bytes iniciais (resolve).
+    Assim um .gz/.zst gravado sem compressão é lido como está. O zstd depende do
+    pacote opcional zstandard (pip install ai_databricks_package[compression]).
+    """
+    NONE = "NONE"
+    GZIP = "GZIP"
+    ZSTD = "ZSTD"
+
+    GZIP_MAGIC = b"\x1f\x8b"
+    ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+    HEADER_SIZE = 4
+    CHUNK_SIZE = 1024 * 1024
+
+    # Valor gravado no Content-Encoding do S3
+    CONTENT_ENCODING = {GZIP: "gzip", ZSTD: "zstd"}
+
+    @staticmethod
+    def normalize(codec: str) -> str:
+        """
+        Valida o nome do codec (None ou vazio equivalem a NONE).
+        """
+        codec = (codec or AiCodec.NONE).upper()
+        if codec not in (AiCodec.NONE, AiCodec.GZIP, AiCodec.ZSTD):
+            raise ValueError(f"Codec de compressão não suportado: {codec}")
+        return codec
+
+    @staticmethod
+    def _get_zstd():
+        try:
+            import zstandard
+            return zstandard
+        except ImportError:
+            raise ImportError("O codec ZSTD requer o pacote zstandard (pip install zstandard).")
+
+    @staticmethod
+    def detect(header: bytes) -> str:
+        """
+        Identifica o codec pelos bytes iniciais do conteúdo.
+        """
+        if header is None:
+            return AiCodec.NONE
+        header = bytes(header[:AiCodec.HEADER_SIZE])
+        if header.startswith(AiCodec.ZSTD_MAGIC):
+            return AiCodec.ZSTD
+        if header.startswith(AiCodec.GZIP_MAGIC):
+            return AiCodec.GZIP
+        return AiCodec.NONE
+
+    @staticmethod
+    def from_metadata(metadata: dict = None, content_encoding: str = None) -> str:
+        """
+        Codec gravado no objeto: metadata ai-codec ou Content-Encoding; NONE quando ausentes.
+        """
+        codec = ((metadata or {}).get("ai-codec") or "").upper()
+        if codec in AiCodec.CONTENT_ENCODING:
+            return codec
+        for name, value in AiCodec.CONTENT_ENCODING.items():
+            if (content_encoding or "").lower() == value:
+                return name
+        return AiCodec.NONE
+
+    @staticmethod
+    def resolve(header: bytes, codec: str) -> str:
+        """
+        Codec do conteúdo quando só a compressão configurada é conhecida (disco, binaryFile):
+        o codec configurado, se o conteúdo começa com o magic number dele, senão NONE
+        (arquivos gravados fora do storage, sem compressão).
+        """
+        codec = AiCodec.normalize(codec)
+        if codec == AiCodec.NONE:
+            return AiCodec.NONE
+        return codec if AiCodec.detect(header) == codec else AiCodec.NONE
+
+    @staticmethod
+    def compress(data: bytes, codec: str, level: int = None) -> bytes:
+        """
+        Comprime o conteúdo com o codec informado.
+        """
+        codec = AiCodec.normalize(codec)
+        if codec == AiCodec.GZIP:
+            # mtime=0 mantém o resultado determinístico (mesmo conteúdo, mesmo ETag)
+            return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+        if codec == AiCodec.ZSTD:
+            zstandard = AiCodec._get_zstd()
+            return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+        return data
+
+    @staticmethod
+    def compress_file(source_path: str, target, codec: str, level: int = None):
+        """
+        Comprime um arquivo local em streaming para o objeto binário target.
+        """
+        codec = AiCodec.normalize(codec)
+        with open(source_path, "rb") as source:
+            if codec == AiCodec.GZIP:
+                with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=6 if level is None else level, mtime=0) as writer:
+                    shutil.copyfileobj(source, writer, AiCodec.CHUNK_SIZE)
+            elif codec == AiCodec.ZSTD:
+                zstandard = AiCodec._get_zstd()
+                zstandard.ZstdCompressor(level=3 if level is None else level).copy_stream(source, target)
+            else:
+                shutil.copyfileobj(source, target, AiCodec.CHUNK_SIZE)
+
+    @staticmethod
+    def decompress_file(local_path: str, codec: str):
+        """
+        Descomprime no lugar um arquivo local gravado com o codec informado (NONE não altera o arquivo).
+        """
+        if AiCodec.normalize(codec) == AiCodec.NONE:
+            return
+        temp_path = local_path + ".decoded"
+        with open(temp_path, "wb") as target:
+            stream = AiCodec.wrap_stream(open(local_path, "rb"), codec)
+            try:
+                shutil.copyfileobj(stream, target, AiCodec.CHUNK_SIZE)
+            finally:
+                stream.close()
+        os.replace(temp_path, local_path)
+
+    @staticmethod
+    def decompress(data: bytes, codec: str) -> bytes:
+        """
+        Descomprime o conteúdo gravado com o codec informado (NONE retorna o próprio conteúdo).
+        """
+        if data is None:
+            return None
+        codec = AiCodec.normalize(codec)
+        if codec == AiCodec.GZIP:
+            return gzip.decompress(bytes(data))
+        if codec == AiCodec.ZSTD:
+            zstandard = AiCodec._get_zstd()
+            return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(bytes(data))).read()
+        return data
+
+    @staticmethod
+    def wrap_stream(stream, codec: str, seekable: bool = False):
+        """
+        Retorna um stream que descomprime o conteúdo gravado com o codec informado.
+
+        Com NONE retorna o próprio stream. Com seekable, o conteúdo comprimido é
+        descomprimido para memória, pois o stream de descompressão não tem seek.
+        """
+        if stream is None:
+            return None
+
+        codec = AiCodec.normalize(codec)
+        if codec == AiCodec.NONE:
+            return stream
+
+        if codec == AiCodec.GZIP:
+            reader = gzip.GzipFile(fileobj=stream, mode="rb")
+        else:
+            reader = AiCodec._get_zstd().ZstdDecompressor().stream_reader(stream, closefd=False)
+
+        decoded = io.BufferedReader(_AiDecodedStream(reader, stream), buffer_size=AiCodec.CHUNK_SIZE)
+        if not seekable:
+            return decoded
+        try:
+            return io.BytesIO(decoded.read())
+        finally:
+            decoded.close()
+
+
+class _AiDecodedStream(io.RawIOBase):
+    """
+    Adapta o leitor de descompressão para RawIOBase, fechando também o stream de origem.
+    """
+    def __init__(self, reader, source):
+        self._reader = reader
+        self._source = source
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        try:
+            data = self._reader.read(len(buffer))
+        except (EOFError, zlib.error, OSError) as e:
+            raise IOError(f"Erro ao descomprimir o conteúdo: {e}")
+        size = len(data)
+        buffer[:size] = data
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._reader.close()
+            self._source.close()
+        super().close()
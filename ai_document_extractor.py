@@ -0,0 +1,427 @@
+import io
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+
+import pandas as pd
+from pdfminer.high_level import extract_text
+from pdfminer.pdfpage import PDFPage
+
+from .ai_codec import AiCodec
+
+from .splitters.ai_base_text_splitter import AiBaseTextSplitter
+from .splitters.ai_json_splitter import AiJsonSplitter
+from .splitters.ai_markdown_splitter import AiMarkdownSplitter
+from .splitters.ai_open_api_splitter import AiOpenApiSplitter
+from .splitters.ai_text_splitter import AiTextSplitter
+from .splitters.split_document import SplitDocument
+
+
+def _extract_page_range(source, page_numbers: list) -> list:
+    """
+    Extrai o texto de um intervalo de páginas (executado nos processos do pool).
+
+    Returns:
+        list: Texto de cada página do intervalo, na ordem.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    text = extract_text(source, page_numbers=page_numbers, codec="utf-8")
+    # O pdfminer separa as páginas com form feed
+    pages = text.split("\f")
+    pages += [""] * (len(page_numbers) - len(pages))
+    return pages[:len(page_numbers)]
+
+
+###################################
+# CLASS AiDocumentExtractor
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiDocumentExtractor:
+    """
+    Extração de texto e divisão em chunks dos arquivos da landing.
+
+    Os métodos são estáticos e não dependem do storage, para que possam ser
+    executados em um pool de processos ou nos executores do Spark.
+    """
+    SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md", ".json")
+    OPENAPI_PATTERN = re.compile(rb'"openapi":')
+    # Pools da extração de PDF: um por thread, reaproveitado entre os arquivos
+    _pdf_local = threading.local()
+    _pdf_pools = []
+    _pdf_pool_lock = threading.Lock()
+
+    @staticmethod
+    def is_supported(file_name: str) -> bool:
+        return file_name.lower().endswith(AiDocumentExtractor.SUPPORTED_EXTENSIONS)
+
+    @staticmethod
+    def is_pdf(file_name: str) -> bool:
+        return file_name.lower().endswith(".pdf")
+
+    @staticmethod
+    def is_openapi(content) -> bool:
+        """
+        Identifica uma spec OpenAPI no texto ou direto em um buffer (bytes, mmap ou memoryview),
+        sem decodificar o arquivo inteiro.
+        """
+        if isinstance(content, str):
+            return '"openapi":' in content
+        return AiDocumentExtractor.OPENAPI_PATTERN.search(content) is not None
+
+    @staticmethod
+    def to_text(content, encoding: str = "utf-8") -> str:
+        """
+        Converte o conteúdo em str; buffers (bytes, mmap ou memoryview) são decodificados
+        direto, sem cópia intermediária.
+        """
+        if content is None or isinstance(content, str):
+            return content
+        return str(content, encoding)
+
+    @staticmethod
+    def create_splitter(file_name: str, text: str, context_size: int = 0, chunk_size: int = 1000, chunk_overlap: int = 200):
+        """
+        Retorna o splitter adequado para o tipo do arquivo.
+
+        Args:
+            file_name (str): Nome do arquivo (a extensão define o splitter).
+            text (str | buffer): Conteúdo do arquivo (usado para identificar specs OpenAPI).
+            context_size (int, optional): Tamanho do contexto. Defaults to 0.
+            chunk_size (int, optional): Tamanho máximo do chunk. Defaults to 1000.
+            chunk_overlap (int, optional): Sobreposição entre chunks. Defaults to 200.
+
+        Returns:
+            AiBaseTextSplitter: splitter ou None quando o formato não é suportado.
+        """
+        name = file_name.lower()
+        if name.endswith(".pdf"):
+            return AiTextSplitter(
+                chunk_size=chunk_size,
+                # Tamanho máximo do chunk em caracteres ou tokens aproximados
+                chunk_overlap=chunk_overlap  # Sobreposição entre chunks
+            )
+        elif name.endswith(".txt"):
+            return AiTextSplitter(
+                context_size=context_size,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+        elif name.endswith(".md"):
+            return AiMarkdownSplitter(
+                context_size=context_size,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+        elif name.endswith(".json"):
+            if AiDocumentExtractor.is_openapi(text):
+                return AiOpenApiSplitter()
+            return AiJsonSplitter(
+                context_size=context_size
+            )
+        return None
+
+    @staticmethod
+    def extract_pdf(source) -> str:
+        """
+        Extrai o texto de um PDF.
+
+        Args:
+            source (str | file-like): Caminho do arquivo ou objeto binário com seek.
+
+        Returns:
+            str: Texto extraído ou None em caso de erro.
+        """
+        try:
+            # Extrai o texto com codificação UTF-8
+            return extract_text(source, codec="utf-8")
+        except Exception as e:
+            print(f"Erro ao extrair texto com pdfminer.six: {e}")
+            return None
+
+    @staticmethod
+    def count_pdf_pages(source) -> int:
+        """
+        Conta as páginas do PDF (caminho ou bytes) sem extrair o texto.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            return sum(1 for _ in PDFPage.get_pages(io.BytesIO(source), check_extractable=False))
+        with open(source, "rb") as fp:
+            return sum(1 for _ in PDFPage.get_pages(fp, check_extractable=False))
+
+    @staticmethod
+    def get_pdf_pool(processes: int):
+        """
+        Retorna o pool de processos da extração de PDF da thread atual, criado na primeira
+        chamada e reaproveitado pelos arquivos seguintes (um pool por thread, para que o
+        timeout de um arquivo não interrompa as páginas de outra thread).
+        """
+        local = AiDocumentExtractor._pdf_local
+        with AiDocumentExtractor._pdf_pool_lock:
+            pool = getattr(local, "pool", None)
+            if pool is not None and pool in AiDocumentExtractor._pdf_pools and local.processes == processes:
+                return pool
+
+        if pool is not None:
+            AiDocumentExtractor._discard_pdf_pool(pool)
+        pool = multiprocessing.get_context("spawn").Pool(processes=processes)
+        with AiDocumentExtractor._pdf_pool_lock:
+            AiDocumentExtractor._pdf_pools.append(pool)
+        local.pool = pool
+        local.processes = processes
+        return pool
+
+    @staticmethod
+    def _discard_pdf_pool(pool):
+        with AiDocumentExtractor._pdf_pool_lock:
+            if pool in AiDocumentExtractor._pdf_pools:
+                AiDocumentExtractor._pdf_pools.remove(pool)
+        # terminate também interrompe as páginas de um PDF que estourou o tempo
+        pool.terminate()
+        pool.join()
+
+    @staticmethod
+    def close_pdf_pools():
+        """
+        Encerra os pools da extração de PDF do processo (recriados na próxima extração).
+        """
+        with AiDocumentExtractor._pdf_pool_lock:
+            pools = list(AiDocumentExtractor._pdf_pools)
+            AiDocumentExtractor._pdf_pools.clear()
+        for pool in pools:
+            pool.terminate()
+            pool.join()
+
+    @staticmethod
+    def extract_pdf_pages(source, max_workers: int = 0, pages_per_task: int = 10, timeout: float = None) -> list:
+        """
+        Extrai o texto do PDF página a página.
+
+        Os intervalos de páginas são distribuídos no pool de processos da thread
+        (get_pdf_pool) e o resultado é remontado na ordem original. As tarefas recebem
+        o caminho do arquivo: um PDF em bytes é gravado uma vez em arquivo temporário
+        em vez de ser serializado em cada tarefa. Com timeout, o pool é encerrado
+        quando o arquivo ultrapassa o tempo limite e recriado no próximo arquivo.
+
+        Args:
+            source (str | bytes): Caminho do arquivo ou conteúdo do PDF.
+            max_workers (int, optional): Processos do pool; 0 extrai no processo atual
+                (ou em um único processo quando há timeout). Defaults to 0.
+            pages_per_task (int, optional): Quantidade de páginas por tarefa. Defaults to 10.
+            timeout (float, optional): Tempo máximo (segundos) para o arquivo todo. Defaults to None.
+
+        Returns:
+            list: Texto de cada página ou None em caso de erro ou timeout.
+        """
+        temp_path = None
+        try:
+            total_pages = AiDocumentExtractor.count_pdf_pages(source)
+            ranges = [list(range(i, min(i + pages_per_task, total_pages)))
+                      for i in range(0, total_pages, max(1, pages_per_task))]
+
+            if max_workers <= 0 and timeout is None:
+                pages = []
+                for page_numbers in ranges:
+                    pages.extend(_extract_page_range(source, page_numbers))
+                return pages
+
+            if isinstance(source, (bytes, bytearray)):
+                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+                    temp_file.write(source)
+                    temp_path = temp_file.name
+                source = temp_path
+
+            deadline = (time.monotonic() + timeout) if timeout is not None else None
+            pool = AiDocumentExtractor.get_pdf_pool(max(1, max_workers))
+            results = [pool.apply_async(_extract_page_range, (source, page_numbers)) for page_numbers in ranges]
+            pages = []
+            try:
+                for result in results:
+                    remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    pages.extend(result.get(timeout=remaining))
+            except multiprocessing.TimeoutError:
+                AiDocumentExtractor._discard_pdf_pool(pool)
+                raise
+            return pages
+        except multiprocessing.TimeoutError:
+            print(f"Erro: tempo limite de {timeout}s excedido na extração do PDF.")
+            return None
+        except Exception as e:
+            print(f"Erro ao extrair texto com pdfminer.six: {e}")
+            return None
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def split_pages_to_rows(file_name: str, pages: list, metadata: dict, context_size: int = 0, chunk_size: int = 1000, chunk_overlap: int = 200) -> list:
+        """
+        Divide cada página separadamente, usando o número real da página no metadata "page"
+        (informado ao splitter pela chave reservada AiBaseTextSplitter.SOURCE_PAGE).
+        """
+        rows = []
+        for index, page_text in enumerate(pages):
+            if page_text is None or page_text.strip() == "":
+                continue
+            page_metadata = dict(metadata)
+            page_metadata[AiBaseTextSplitter.SOURCE_PAGE] = index + 1
+            rows.extend(AiDocumentExtractor.split_to_rows(file_name, page_text, page_metadata,
+                                                          context_size, chunk_size, chunk_overlap))
+        return rows
+
+    @staticmethod
+    def split_to_rows(file_name: str, text: str, metadata: dict, context_size: int = 0, chunk_size: int = 1000, chunk_overlap: int = 200) -> list:
+        """
+        Divide o texto em documentos e converte cada um em uma linha da bronze.
+
+        O texto pode ser um buffer (ex: AiDiskStorage.read_buffer): a detecção de OpenAPI
+        é feita no buffer e o OpenAPI splitter faz o parse direto dele.
+
+        Returns:
+            list: Lista de dict com id, content, content_to_embed, metadata e file_key.
+        """
+        if text is None:
+            return []
+        splitter = AiDocumentExtractor.create_splitter(file_name, text, context_size, chunk_size, chunk_overlap)
+        if splitter is None:
+            return []
+        if not isinstance(splitter, AiOpenApiSplitter):
+            text = AiDocumentExtractor.to_text(text)
+
+        rows = []
+        document_list = splitter.create_documents(text, metadata)
+
+        # Adiciona cada bloco como uma linha no DataFrame
+        for document in document_list:
+            content = document.page_content.strip()
+            content_to_embed = content
+            if isinstance(document, SplitDocument):
+                content_to_embed = document.content_to_embed
+
+            rows.append({"id": None,
+                         "content": content,
+                         "content_to_embed": content_to_embed,
+                         "metadata": document.metadata,
+                         "file_key": document.metadata["file_key"]
+                         })
+        return rows
+
+    @staticmethod
+    def build_metadata(file_name: str, category: str, sub_category: str, index_entry: dict = None, metadata_json: str = None) -> dict:
+        """
+        Monta o metadata do arquivo: entrada do índice da pasta (index_entry), conteúdo do .metadata
+        individual (metadata_json) ou vazio, acrescido de file_key, category e sub_category.
+        """
+        if index_entry is not None:
+            metadata = dict(index_entry)
+        elif metadata_json:
+            metadata = json.loads(metadata_json)
+        else:
+            metadata = {}
+
+        metadata["file_key"] = os.path.basename(file_name)
+        metadata["category"] = category
+        metadata["sub_category"] = sub_category
+        return metadata
+
+    @staticmethod
+    def stringify_metadata(metadata: dict) -> dict:
+        """
+        Converte os valores do metadata em str (coluna MapType(StringType, StringType) da bronze).
+        """
+        return {k: (None if v is None else str(v)) for k, v in metadata.items()}
+
+    @staticmethod
+    def process_file(payload: dict, context_size: int = 0, chunk_size: int = 1000, chunk_overlap: int = 200,
+                     pdf_workers: int = 0, pdf_timeout: float = None) -> list:
+        """
+        Etapa de CPU da ingestão: extrai o texto (PDF) e divide em linhas.
+
+        Args:
+            payload (dict): name, metadata e text, pdf_bytes ou pdf_path (arquivo temporário removido ao final).
+            pdf_workers (int, optional): Processos para extrair as páginas do PDF. Defaults to 0.
+            pdf_timeout (float, optional): Tempo máximo (segundos) por PDF. Defaults to None.
+
+        Returns:
+            list: Linhas da bronze do arquivo.
+        """
+        text = payload.get("text")
+        pdf_path = payload.get("pdf_path")
+        pdf_bytes = payload.get("pdf_bytes")
+        if pdf_path is not None or pdf_bytes is not None:
+            try:
+                pages = AiDocumentExtractor.extract_pdf_pages(pdf_bytes if pdf_bytes is not None else pdf_path,
+                                                              max_workers=pdf_workers, timeout=pdf_timeout)
+            finally:
+                if pdf_path is not None and os.path.exists(pdf_path):
+                    os.remove(pdf_path)
+
+            if pages is None:
+                return []
+            return AiDocumentExtractor.split_pages_to_rows(payload["name"], pages, payload["metadata"],
+                                                           context_size, chunk_size, chunk_overlap)
+
+        if text is None:
+            return []
+
+        return AiDocumentExtractor.split_to_rows(payload["name"], text, payload["metadata"],
+                                                 context_size, chunk_size, chunk_overlap)
+
+    @staticmethod
+    def extract_batches(batches, category: str, sub_category: str, context_size: int = 0, chunk_size: int = 1000, chunk_overlap: int = 200,
+                        pdf_timeout: float = None, codec: str = AiCodec.NONE):
+        """
+        Função para mapInPandas: converte lotes do binaryFile em linhas da bronze nos executores.
+
+        Args:
+            batches (Iterator[pd.DataFrame]): Lotes com as colunas path, content (bytes) e
+                metadata_json (conteúdo do .metadata ou None).
+            codec (str, optional): Compressão configurada no storage. O binaryFile não traz a metadata
+                do objeto, então o conteúdo é descomprimido quando começa com o magic number desse codec.
+
+        Yields:
+            pd.DataFrame: Linhas com id, content, content_to_embed, metadata e file_key.
+        """
+        try:
+            yield from AiDocumentExtractor._extract_batches(batches, category, sub_category, context_size,
+                                                            chunk_size, chunk_overlap, pdf_timeout, codec)
+        finally:
+            # O pool do timeout é compartilhado pelos PDFs da task e encerrado ao final dela
+            AiDocumentExtractor.close_pdf_pools()
+
+    @staticmethod
+    def _extract_batches(batches, category: str, sub_category: str, context_size: int, chunk_size: int, chunk_overlap: int,
+                         pdf_timeout: float, codec: str):
+        for batch in batches:
+            rows = []
+            for path, content, metadata_json in zip(batch["path"], batch["content"], batch["metadata_json"]):
+                file_name = path.split("/")[-1]
+                if not AiDocumentExtractor.is_supported(file_name):
+                    print("Formato de arquivo não suportado: " + path)
+                    continue
+                try:
+                    # Conteúdo gravado com a compressão do storage (gzip/zstd) é descomprimido aqui
+                    content = AiCodec.decompress(content, AiCodec.resolve(content[:AiCodec.HEADER_SIZE], codec))
+                    metadata = AiDocumentExtractor.build_metadata(file_name, category, sub_category, metadata_json=metadata_json)
+
+                    if AiDocumentExtractor.is_pdf(file_name):
+                        pages = AiDocumentExtractor.extract_pdf_pages(bytes(content), timeout=pdf_timeout)
+                        file_rows = AiDocumentExtractor.split_pages_to_rows(file_name, pages or [], metadata,
+                                                                            context_size, chunk_size, chunk_overlap)
+                    else:
+                        file_rows = AiDocumentExtractor.split_to_rows(file_name, content, metadata,
+                                                                      context_size, chunk_size, chunk_overlap)
+
+                    for row in file_rows:
+                        row["metadata"] = AiDocumentExtractor.stringify_metadata(row["metadata"])
+                        rows.append(row)
+                except Exception as e:
+                    print(f"Erro ao processar o arquivo {path}: {e}")
+
+            yield pd.DataFrame(rows, columns=["id", "content", "content_to_embed", "metadata", "file_key"])
@@ -1,30 +1,208 @@
+import json
+import threading
+import time
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 from langchain_huggingface import HuggingFaceEmbeddings
 from pyspark.sql.functions import pandas_udf
-from pyspark.sql.types import ArrayType, DoubleType
+from pyspark.sql.types import ArrayType, DoubleType, FloatType
 
+from .ai_embedding_cache import AiEmbeddingCache
 from .ai_utils import AiUtils
 
 
+###################################
+# CLASS AiEmbeddingModelRegistry
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiEmbeddingModelRegistry:
+    """
+    Registro de modelos de embedding por processo Python.
+
+    Cada modelo é carregado uma única vez por worker, identificado pela chave
+    (model_name, device, kwargs). Como o estado é de classe, o mesmo modelo é
+    reaproveitado entre os lotes Arrow de uma UDF e entre as tasks Spark quando
+    o worker Python é reutilizado (spark.python.worker.reuse).
+    """
+    _models = {}
+    _key_locks = {}
+    _lock = threading.Lock()
+    _stats = {"hits": 0, "misses": 0, "load_time": 0.0}
+
+    @staticmethod
+    def _build_key(model_name: str, device: str, model_kwargs: dict, encode_kwargs: dict) -> tuple:
+        kwargs = json.dumps({"model_kwargs": model_kwargs or {}, "encode_kwargs": encode_kwargs or {}},
+                            sort_keys=True, default=str)
+        return (model_name, device, kwargs)
+
+    @staticmethod
+    def get_model(model_name: str, device: str = "cpu", model_kwargs: dict = None, encode_kwargs: dict = None) -> HuggingFaceEmbeddings:
+        """
+        Retorna o modelo do registro, carregando-o na primeira chamada.
+
+        Args:
+            model_name (str): Nome do modelo HuggingFace.
+            device (str, optional): Dispositivo do modelo. Defaults to "cpu".
+            model_kwargs (dict, optional): Parâmetros adicionais de carga do modelo.
+            encode_kwargs (dict, optional): Parâmetros adicionais do encode.
+
+        Returns:
+            HuggingFaceEmbeddings: Cliente de embedding já carregado.
+        """
+        registry = AiEmbeddingModelRegistry
+        key = registry._build_key(model_name, device, model_kwargs, encode_kwargs)
+
+        with registry._lock:
+            model = registry._models.get(key)
+            if model is not None:
+                registry._stats["hits"] += 1
+                return model
+            key_lock = registry._key_locks.setdefault(key, threading.Lock())
+
+        # Lock por chave: threads concorrentes esperam a mesma carga em vez de duplicá-la
+        with key_lock:
+            with registry._lock:
+                model = registry._models.get(key)
+                if model is not None:
+                    registry._stats["hits"] += 1
+                    return model
+
+            start = time.perf_counter()
+            kwargs = dict(model_kwargs or {})
+            kwargs["device"] = device
+            model = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=kwargs, encode_kwargs=dict(encode_kwargs or {}))
+            elapsed = time.perf_counter() - start
+
+            with registry._lock:
+                registry._models[key] = model
+                registry._stats["misses"] += 1
+                registry._stats["load_time"] += elapsed
+
+            print(f"Modelo de embedding '{model_name}' ({device}) carregado em {elapsed:.2f}s.")
+            return model
+
+    @staticmethod
+    def warm_up(model_name: str = "sentence-transformers/all-MiniLM-L6-v2", device: str = "cpu", model_kwargs: dict = None, encode_kwargs: dict = None) -> HuggingFaceEmbeddings:
+        """
+        Carrega o modelo e executa uma inferência curta para inicializar o runtime,
+        evitando que o primeiro lote pague o custo de carga.
+        """
+        model = AiEmbeddingModelRegistry.get_model(model_name, device, model_kwargs, encode_kwargs)
+        model.embed_documents(["warm-up"])
+        return model
+
+    @staticmethod
+    def get_stats() -> dict:
+        """
+        Retorna os contadores do registro.
+
+        Returns:
+            dict: hits, misses, load_time (segundos) e models (quantidade carregada).
+        """
+        with AiEmbeddingModelRegistry._lock:
+            stats = dict(AiEmbeddingModelRegistry._stats)
+            stats["models"] = len(AiEmbeddingModelRegistry._models)
+        return stats
+
+    @staticmethod
+    def clear():
+        """
+        Remove todos os modelos do registro e zera os contadores.
+        """
+        with AiEmbeddingModelRegistry._lock:
+            AiEmbeddingModelRegistry._models.clear()
+            AiEmbeddingModelRegistry._key_locks.clear()
+            AiEmbeddingModelRegistry._stats = {"hits": 0, "misses": 0, "load_time": 0.0}
+
+
 ###################################
 # CLASS AiEmbedding
 # Author: Airton Lira Junior
 # Date: 2025-05-23
-################################### 
+###################################
 
 class AiEmbedding:
+    # UDF iterator com os parâmetros padrão, criada na primeira chamada de get_embeddings_iter_udf
+    _default_iter_udf = None
 
     @staticmethod
-    def process_embeddings(list_text: list, model_name="sentence-transformers/all-MiniLM-L6-v2") -> list:
+    def embed_batch(list_text: list, model_name="sentence-transformers/all-MiniLM-L6-v2", device: str = "cpu", batch_size: int = 64,
+                    cache: AiEmbeddingCache = None) -> np.ndarray:
+        """
+        Gera os embeddings de uma lista de textos em mini-lotes.
+
+        Os textos são ordenados por tamanho antes de formar os lotes, para que
+        cada lote tenha textos de comprimento parecido e o padding seja mínimo.
+        O resultado volta na ordem original.
+
+        Args:
+            list_text (list): Textos para gerar os embeddings.
+            model_name (str, optional): Nome do modelo HuggingFace.
+            device (str, optional): Dispositivo do modelo. Defaults to "cpu".
+            batch_size (int, optional): Quantidade de textos por lote. Defaults to 64.
+            cache (AiEmbeddingCache, optional): Cache consultado antes do modelo; somente os
+                textos não encontrados são processados e depois gravados no cache.
+
+        Returns:
+            np.ndarray: Matriz float32 contígua (len(list_text), dimensão).
+        """
+        if cache is not None:
+            return AiEmbedding._embed_batch_cached(list_text, model_name, device, batch_size, cache)
+
+        deploy_client = AiEmbeddingModelRegistry.get_model(model_name, device)
+        if not deploy_client:
+            return AiUtils.handler_error("Erro embed_batch: deploy_client não inicializado.")
+
+        texts = ["" if text is None else str(text) for text in list_text]
+        if len(texts) == 0:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Agrupa por tamanho (length bucketing) para reduzir o padding
+        batch_size = max(1, batch_size or 1)
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        matrix = None
+        for i in range(0, len(order), batch_size):
+            index = order[i:i + batch_size]
+            batch = np.asarray(deploy_client.embed_documents([texts[j] for j in index]), dtype=np.float32)
+            if matrix is None:
+                matrix = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            matrix[index] = batch
+
+        return matrix
+
+    @staticmethod
+    def _embed_batch_cached(list_text: list, model_name: str, device: str, batch_size: int, cache: AiEmbeddingCache) -> np.ndarray:
+        hashes = [AiEmbeddingCache.content_hash(text) for text in list_text]
+        cached = cache.get_many(model_name, hashes)
+
+        miss_index = [i for i, h in enumerate(hashes) if h not in cached]
+        # Conteúdos repetidos no mesmo lote são processados uma única vez
+        miss_hashes = list(dict.fromkeys(hashes[i] for i in miss_index))
+        cache.record(len(hashes) - len(miss_index), len(miss_index))
+
+        if len(miss_hashes) > 0:
+            first_text = {}
+            for i in miss_index:
+                first_text.setdefault(hashes[i], list_text[i])
+            computed = AiEmbedding.embed_batch([first_text[h] for h in miss_hashes], model_name, device, batch_size)
+            new_entries = dict(zip(miss_hashes, computed))
+            cache.put_many(model_name, new_entries)
+            cached.update(new_entries)
+
+        if len(hashes) == 0:
+            return np.empty((0, 0), dtype=np.float32)
+
+        return np.ascontiguousarray(np.stack([cached[h] for h in hashes]), dtype=np.float32)
+
+    @staticmethod
+    def process_embeddings(list_text: list, model_name="sentence-transformers/all-MiniLM-L6-v2", device: str = "cpu", batch_size: int = 64,
+                           cache: AiEmbeddingCache = None) -> list:
         try:
-            # Inicializa o cliente
-            deploy_client = HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": "cpu"})
-            if not deploy_client:
-                return AiUtils.handler_error("Erro _embed_query: deploy_client não inicializado.")
-            embeddings = []
-            for text in list_text:
-                embeddings.append(deploy_client.embed_query(text))
-            return embeddings
+            return AiEmbedding.embed_batch(list_text, model_name, device, batch_size, cache).tolist()
         except Exception as api_error:
             return AiUtils.handler_error(f"Erro ao chamar endpoint da API de embedding {model_name}: {api_error}")
 
@@ -63,3 +241,46 @@ class AiEmbedding:
             return result_series
         except Exception as api_error:
             return AiUtils.handler_error(f"Erro UDF: Erro ao chamar endpoint da API de embedding: {api_error}")
+
+    @staticmethod
+    def create_embeddings_iter_udf(model_name="sentence-transformers/all-MiniLM-L6-v2", device: str = "cpu", batch_size: int = 64,
+                                   cache_config: dict = None):
+        """
+        Cria uma pandas_udf do tipo Iterator[pd.Series] -> Iterator[pd.Series].
+
+        O modelo é obtido uma única vez por task e todos os lotes Arrow da
+        partição (limitados por spark.sql.execution.arrow.maxRecordsPerBatch)
+        passam pelo mesmo modelo. O retorno é ArrayType(FloatType()).
+
+        Args:
+            model_name (str, optional): Nome do modelo HuggingFace.
+            device (str, optional): Dispositivo do modelo. Defaults to "cpu".
+            batch_size (int, optional): Quantidade de textos por mini-lote. Defaults to 64.
+            cache_config (dict, optional): Configuração do AiEmbeddingCache usado pela UDF
+                (ex: {"type": "SQLITE", "path": "/local_disk0/embedding_cache.db"}). O SQLITE é
+                aberto e fechado em cada task; o MEMORY é compartilhado pelo processo do worker. Os
+                hits e misses do cache ficam no executor (get_stats da instância) e não voltam ao driver.
+        """
+        @pandas_udf(ArrayType(FloatType()))
+        def embeddings_iter_udf(batches: Iterator[pd.Series]) -> Iterator[pd.Series]:
+            AiEmbeddingModelRegistry.get_model(model_name, device)
+            cache = AiEmbeddingCache.open(cache_config) if cache_config is not None else None
+            try:
+                for texts in batches:
+                    matrix = AiEmbedding.embed_batch(texts.tolist(), model_name, device, batch_size, cache)
+                    yield pd.Series(list(matrix), index=texts.index)
+            finally:
+                if cache is not None:
+                    cache.close()
+
+        return embeddings_iter_udf
+
+    @staticmethod
+    def get_embeddings_iter_udf():
+        """
+        Retorna a UDF iterator com os parâmetros padrão, criada uma única vez na primeira chamada.
+        """
+        if AiEmbedding._default_iter_udf is None:
+            AiEmbedding._default_iter_udf = AiEmbedding.create_embeddings_iter_udf()
+        return AiEmbedding._default_iter_udf
+
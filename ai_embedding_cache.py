@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from .ai_utils import AiUtils
+
+
+###################################
+# CLASS AiEmbeddingCache
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiEmbeddingCache:
+    """
+    Classe base para o cache de embeddings.
+
+    As entradas são identificadas por (model_name, sha256(content_to_embed)),
+    de forma que um conteúdo que não mudou nunca é processado novamente.
+    """
+    # Caches MEMORY compartilhados no processo (um por configuração)
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, config: dict):
+        """
+        Inicializa a classe AiEmbeddingCache.
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+        """
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def get_instance(config: dict):
+        """
+        retorna a instância pelo tipo solicitado
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                type (str): (SQLITE/MEMORY) DEFAULT: SQLITE
+                path (str): arquivo do cache (quando for SQLITE)
+        """
+        if ((config.get("type") or "SQLITE").upper() == "MEMORY"):
+            return AiMemoryEmbeddingCache(config)
+        else:
+            return AiSqliteEmbeddingCache(config)
+
+    @staticmethod
+    def open(config: dict):
+        """
+        Abre o cache para uma task (ex: UDF nos executores).
+
+        O MEMORY é uma instância única por processo e configuração, reaproveitada entre as
+        tasks do mesmo worker Python (close não a descarta); os outros tipos criam uma nova
+        instância, que deve ser fechada com close ao final da task.
+        """
+        if (config.get("type") or "SQLITE").upper() != "MEMORY":
+            return AiEmbeddingCache.get_instance(config)
+
+        key = json.dumps(config, sort_keys=True, default=str)
+        with AiEmbeddingCache._shared_lock:
+            cache = AiEmbeddingCache._shared.get(key)
+            if cache is None:
+                cache = AiEmbeddingCache._shared[key] = AiMemoryEmbeddingCache(config)
+            return cache
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """
+        Retorna o sha256 (hex) do texto que será enviado para o modelo.
+        """
+        return hashlib.sha256(("" if text is None else str(text)).encode("utf-8")).hexdigest()
+
+    def get_many(self, model_name: str, hashes: list) -> dict:
+        """
+        Busca os embeddings já calculados.
+
+        Args:
+            model_name (str): Nome do modelo de embedding.
+            hashes (list): Lista de hashes de conteúdo.
+
+        Returns:
+            dict: hash -> np.ndarray (float32) somente para as entradas encontradas.
+        """
+        raise Exception("method not implemented.")
+
+    def put_many(self, model_name: str, embeddings: dict):
+        """
+        Grava os embeddings calculados.
+
+        Args:
+            model_name (str): Nome do modelo de embedding.
+            embeddings (dict): hash -> vetor de embedding.
+        """
+        raise Exception("method not implemented.")
+
+    def record(self, hits: int, misses: int):
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_stats(self) -> dict:
+        """
+        Retorna hits, misses e hit_rate acumulados pela instância.
+        """
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": (self.hits / total) if total > 0 else 0.0}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        pass
+
+
+###################################
+# CLASS AiSqliteEmbeddingCache
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiSqliteEmbeddingCache(AiEmbeddingCache):
+    """
+    Cache de embeddings persistido em um arquivo SQLite local.
+    """
+    # Limite de variáveis por comando do SQLite
+    QUERY_SIZE = 500
+
+    def __init__(self, config: dict):
+        """
+        Inicializa a classe AiSqliteEmbeddingCache.
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                path (str): caminho do arquivo SQLite
+                type (str): SQLITE
+        """
+        super().__init__(config)
+        AiUtils.validate_config(config, ["path"])
+        self.path = config["path"]
+
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache ("
+            "model_name TEXT NOT NULL, content_hash TEXT NOT NULL, embedding BLOB NOT NULL, "
+            "PRIMARY KEY (model_name, content_hash))"
+        )
+        self._connection.commit()
+
+    # Override
+    def get_many(self, model_name: str, hashes: list) -> dict:
+        result = {}
+        keys = list(set(hashes))
+        with self._lock:
+            for i in range(0, len(keys), AiSqliteEmbeddingCache.QUERY_SIZE):
+                chunk = keys[i:i + AiSqliteEmbeddingCache.QUERY_SIZE]
+                rows = self._connection.execute(
+                    "SELECT content_hash, embedding FROM embedding_cache WHERE model_name = ? AND content_hash IN ("
+                    + ",".join("?" * len(chunk)) + ")",
+                    [model_name] + chunk
+                ).fetchall()
+                for content_hash, blob in rows:
+                    result[content_hash] = np.frombuffer(blob, dtype=np.float32)
+        return result
+
+    # Override
+    def put_many(self, model_name: str, embeddings: dict):
+        rows = [(model_name, content_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                for content_hash, vector in embeddings.items()]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (model_name, content_hash, embedding) VALUES (?, ?, ?)", rows)
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+###################################
+# CLASS AiMemoryEmbeddingCache
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiMemoryEmbeddingCache(AiEmbeddingCache):
+    """
+    Cache de embeddings em memória, usado como substituto local do cache persistido.
+    """
+    def __init__(self, config: dict):
+        """
+        Inicializa a classe AiMemoryEmbeddingCache.
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                type (str): MEMORY
+        """
+        super().__init__(config)
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    # Override
+    def get_many(self, model_name: str, hashes: list) -> dict:
+        with self._lock:
+            return {h: self._entries[(model_name, h)] for h in hashes if (model_name, h) in self._entries}
+
+    # Override
+    def put_many(self, model_name: str, embeddings: dict):
+        with self._lock:
+            for content_hash, vector in embeddings.items():
+                self._entries[(model_name, content_hash)] = np.asarray(vector, dtype=np.float32)
@@ -0,0 +1,165 @@
+import asyncio
+import inspect
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+###################################
+# CLASS AiIngestionEngine
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiIngestionEngine:
+    """
+    Pipeline de ingestão de arquivos em duas etapas.
+
+    A etapa de I/O (download do arquivo e do .metadata) roda em um pool de threads
+    e a etapa de CPU (extração do PDF e split) roda em um pool de processos.
+    O número de arquivos em andamento é limitado por max_in_flight (backpressure)
+    e um erro em um arquivo não interrompe os demais.
+
+    A etapa de I/O também aceita uma corrotina (ex: leitura pelo AiAsyncStorage),
+    executada em um event loop dedicado do engine em vez do pool de threads.
+
+    Os pools são criados na primeira execução e reaproveitados pelas execuções
+    seguintes (ex: uma por sub categoria), evitando iniciar os processos a cada
+    chamada de run; close_pools encerra os pools e close também o event loop.
+    """
+    FETCH = "FETCH"
+    PROCESS = "PROCESS"
+
+    def __init__(self, max_io_workers: int = 8, max_cpu_workers: int = 0, max_in_flight: int = 32):
+        """
+        Inicializa a classe AiIngestionEngine.
+
+        Args:
+            max_io_workers (int, optional): Threads para downloads. Defaults to 8.
+            max_cpu_workers (int, optional): Processos para extração e split; 0 executa
+                a etapa de CPU no pool de threads. Defaults to 0.
+            max_in_flight (int, optional): Máximo de arquivos em andamento. Defaults to 32.
+        """
+        self.max_io_workers = max(1, max_io_workers)
+        self.max_cpu_workers = max(0, max_cpu_workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self._io_pool = None
+        self._cpu_pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pools(self) -> tuple:
+        """
+        Retorna os pools de I/O e de CPU (None quando max_cpu_workers = 0), criando-os na primeira chamada.
+        """
+        with self._pool_lock:
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=self.max_io_workers)
+            if self._cpu_pool is None and self.max_cpu_workers > 0:
+                # spawn evita fork de um processo com threads de I/O ativas
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self.max_cpu_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._io_pool, self._cpu_pool
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Event loop das etapas de I/O assíncronas, reaproveitado entre as execuções
+        (clientes assíncronos ficam associados ao loop em que foram criados).
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="AiIngestionEngineLoop", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def run_coroutine(self, coroutine):
+        """
+        Executa uma corrotina no event loop do engine e aguarda o resultado.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.get_loop()).result()
+
+    def close_pools(self):
+        """
+        Encerra os pools de threads e processos (recriados na próxima execução).
+        """
+        with self._pool_lock:
+            if self._io_pool is not None:
+                self._io_pool.shutdown(wait=True, cancel_futures=True)
+                self._io_pool = None
+            if self._cpu_pool is not None:
+                self._cpu_pool.shutdown(wait=True, cancel_futures=True)
+                self._cpu_pool = None
+
+    def close(self):
+        """
+        Encerra os pools e o event loop das etapas assíncronas.
+        """
+        self.close_pools()
+
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join()
+                self._loop.close()
+                self._loop = None
+                self._loop_thread = None
+
+    def run(self, items, fetch_fn, process_fn):
+        """
+        Executa o pipeline e entrega os resultados conforme cada arquivo termina.
+
+        Args:
+            items (iterable): Itens de entrada (ex: arquivos do list_path).
+            fetch_fn (callable): Etapa de I/O: item -> payload (None ignora o item). Pode ser
+                uma função assíncrona (async def).
+            process_fn (callable): Etapa de CPU: payload -> resultado. Precisa ser
+                serializável (pickle) quando max_cpu_workers > 0.
+
+        Yields:
+            dict: item, result e error (exceção da etapa que falhou ou None).
+        """
+        items = iter(items)
+        pending = {}
+        is_async = inspect.iscoroutinefunction(fetch_fn)
+        io_pool, cpu_pool = self._get_pools()
+
+        def submit_next() -> bool:
+            for item in items:
+                if is_async:
+                    future = asyncio.run_coroutine_threadsafe(fetch_fn(item), self.get_loop())
+                else:
+                    future = io_pool.submit(fetch_fn, item)
+                pending[future] = (item, AiIngestionEngine.FETCH)
+                return True
+            return False
+
+        try:
+            for _ in range(self.max_in_flight):
+                if not submit_next():
+                    break
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    item, stage = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        submit_next()
+                        yield {"item": item, "result": None, "error": e}
+                        continue
+
+                    if stage == AiIngestionEngine.FETCH and result is not None:
+                        pool = cpu_pool if cpu_pool is not None else io_pool
+                        pending[pool.submit(process_fn, result)] = (item, AiIngestionEngine.PROCESS)
+                        continue
+
+                    submit_next()
+                    yield {"item": item, "result": result, "error": None}
+        finally:
+            # Os pools continuam ativos para a próxima execução; só os itens desta são cancelados
+            for future in pending:
+                future.cancel()
@@ -1,19 +1,22 @@
+import asyncio
 import json
 import os
+import uuid
+from functools import partial
 
-from pdfminer.high_level import extract_text
-from pyspark.sql.functions import col, regexp_replace, trim, monotonically_increasing_id, row_number, lit
+import pandas as pd
+from pyspark import StorageLevel
+from pyspark.sql.functions import col, regexp_replace, trim, lit, sha2, concat_ws, coalesce, regexp_extract, current_timestamp, xxhash64, row_number, to_json, when
 from pyspark.sql.types import StructType, StructField, StringType, MapType, LongType
 from pyspark.sql.window import Window
 
+from .ai_document_extractor import AiDocumentExtractor
 from .ai_embedding import AiEmbedding
+from .ai_ingestion_engine import AiIngestionEngine
+from .ai_async_storage import AiAsyncStorage
+from .ai_codec import AiCodec
 from .ai_storage import AiStorage
 from .ai_utils import AiUtils
-from .splitters.ai_json_splitter import AiJsonSplitter
-from .splitters.ai_markdown_splitter import AiMarkdownSplitter
-from .splitters.ai_open_api_splitter import AiOpenApiSplitter
-from .splitters.ai_text_splitter import AiTextSplitter
-from .splitters.split_document import SplitDocument
 
 
 #################################################
@@ -24,18 +27,22 @@ class AiLayerProcessor:
     BRONZE_PATH = "bronze"
     SILVER_PATH = "silver"
     GOLD_PATH = "gold"
+    # Mantém o id gerado pelo xxhash64 positivo (63 bits)
+    ID_MASK = 0x7FFFFFFFFFFFFFFF
 
     def __init__(self, catalog: str, spark, bucket):
         super().__init__()
         self.catalog = catalog
         self.spark = spark
         self.bucket = bucket
+        self.run_stats = []
 
     def get_newest_folder(self, full_path: str, extraction_date: str = ""):
         if extraction_date != "":
             return AiUtils.define_extraction_path(category=full_path, extraction_date=extraction_date)
 
-        list = self.storage.list_path(full_path, type="PATH")
+        # Atendida pela árvore do list_tree quando a categoria já foi listada
+        list = self.storage.list_path(full_path, type="PATH") or []
 
         ordered_list = sorted(list, key=lambda item: item['name'], reverse=True)
 
@@ -55,203 +62,738 @@ class AiLayerProcessor:
             for t_name in table_name_list:
                 self.spark.sql(f"DROP TABLE IF EXISTS {catalog_schema}.{t_name}")
 
-    def save_as_delta(self, df, category: str, sub_category: str, sulfix: str, mode: str = "overwrite") -> str:
+    def save_as_delta(self, df, category: str, sub_category: str, sulfix: str, mode: str = "overwrite",
+                      options: dict = None) -> str:
         """
         Salva o DataFrame como uma tabela Delta.
+
+        Args:
+            options (dict, optional): Opções do writer Delta (ex: overwriteSchema). Defaults to None.
         """
         table_name = f"{self.catalog}.{category}.{sub_category}_" + sulfix
  
         self.spark.sql(f"CREATE SCHEMA IF NOT EXISTS {self.catalog}.{category};")
         self.spark.sql(f"CREATE DATABASE IF NOT EXISTS {self.catalog}.{category};")
         
-        df.write.format("delta").mode(mode).saveAsTable(table_name)
+        df.write.format("delta").mode(mode).options(**(options or {})).saveAsTable(table_name)
 
         return table_name
 
+    @staticmethod
+    def with_chunk_key(df):
+        """
+        Adiciona as colunas content_hash (sha256 do content_to_embed) e chunk_key, a chave
+        estável do chunk formada por file_key + page + position + content_hash.
+        Chunks repetidos recebem chaves distintas (with_unique_chunk_key).
+        """
+        df = df.withColumn("content_hash", sha2(coalesce(col("content_to_embed"), lit("")), 256))
+        df = df.withColumn("chunk_key", AiLayerProcessor.get_chunk_key(col("content_hash")))
+        return AiLayerProcessor.with_unique_chunk_key(df, order_column=to_json(col("metadata")))
+
+    @staticmethod
+    def with_unique_chunk_key(df, partition_columns: list = None, order_column=None):
+        """
+        Torna a chunk_key única sem descartar linhas: a primeira ocorrência mantém a chave e
+        as repetições (mesmo arquivo, página, posição e conteúdo) recebem a chave com o
+        ordinal da ocorrência. A janela é particionada pela chave, sem partição única.
+
+        Args:
+            partition_columns (list, optional): Colunas que, junto com a chunk_key, formam a chave.
+            order_column (Column, optional): Ordem das ocorrências repetidas. Defaults to chunk_key.
+        """
+        partition = [col(c) for c in (partition_columns or [])] + [col("chunk_key")]
+        occurrence = row_number().over(Window.partitionBy(*partition)
+                                       .orderBy(order_column if order_column is not None else col("chunk_key")))
+        return df.withColumn("chunk_key", when(occurrence == 1, col("chunk_key"))
+                             .otherwise(sha2(concat_ws("|", col("chunk_key"), occurrence.cast("string")), 256)))
+
+    @staticmethod
+    def get_chunk_key(content_hash=None):
+        """
+        Expressão da chunk_key (file_key + page + position + content_hash).
+        """
+        if content_hash is None:
+            content_hash = sha2(coalesce(col("content_to_embed"), lit("")), 256)
+        return sha2(concat_ws("|",
+                              coalesce(col("file_key"), lit("")),
+                              coalesce(col("metadata.page"), lit("")),
+                              coalesce(col("metadata.position"), lit("")),
+                              content_hash), 256)
+
+    @staticmethod
+    def get_hash_id(*columns):
+        """
+        Id estável a partir do xxhash64 das colunas, calculado em cada partição (sem window global).
+        O mesmo chunk recebe o mesmo id em todas as execuções.
+
+        O hash de 63 bits não é único: as colisões não são resolvidas (um deslocamento mudaria o id
+        de chunks já indexados), e sim detectadas, quando habilitado (check_ids), antes da gravação
+        da gold (AiSilverToGoldProcessor.check_unique_ids), que falha em vez de gravar dois chunks
+        com o mesmo id.
+        """
+        return xxhash64(*columns).bitwiseAND(lit(AiLayerProcessor.ID_MASK))
+
+    @staticmethod
+    def union_all(data_frames: list):
+        """
+        Une os DataFrames (unionByName) em uma árvore balanceada, com profundidade log2(n)
+        em vez de uma cadeia com uma união por tabela.
+        """
+        while len(data_frames) > 1:
+            data_frames = [data_frames[i].unionByName(data_frames[i + 1]) if i + 1 < len(data_frames) else data_frames[i]
+                           for i in range(0, len(data_frames), 2)]
+        return data_frames[0]
+
+    def ensure_long_id(self, table_name: str):
+        """
+        Migra uma única vez a coluna id de uma tabela existente para bigint (ids do get_hash_id).
+        Tabelas gravadas com o id sequencial (int) são regravadas com overwriteSchema, mantendo os
+        valores, para que os append e MERGE seguintes não falhem por tipo incompatível.
+        """
+        if not self.spark.catalog.tableExists(table_name):
+            return
+        id_type = dict(self.spark.table(table_name).dtypes).get("id")
+        if id_type is None or id_type == "bigint":
+            return
+        print(f"Migrando a coluna id da tabela {table_name} de {id_type} para bigint...")
+        (self.spark.table(table_name).withColumn("id", col("id").cast(LongType()))
+         .write.format("delta").mode("overwrite").option("overwriteSchema", "true").saveAsTable(table_name))
+
+    def set_conf(self, key: str, value: str):
+        """
+        Altera uma configuração da sessão Spark e retorna o valor anterior (None quando não definido),
+        para ser restaurado com restore_conf ao final da operação.
+        """
+        previous = self.spark.conf.get(key, None)
+        self.spark.conf.set(key, value)
+        return previous
+
+    def restore_conf(self, key: str, previous: str):
+        """
+        Restaura o valor anterior da configuração (remove quando não estava definida).
+        """
+        if previous is None:
+            self.spark.conf.unset(key)
+        else:
+            self.spark.conf.set(key, previous)
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        """
+        Verifica se a tabela existe e possui a coluna informada.
+        """
+        if not self.spark.catalog.tableExists(table_name):
+            return False
+        return column_name in self.spark.table(table_name).columns
+
+    def get_last_operation(self, table_name: str) -> dict:
+        """
+        Retorna a última operação registrada no histórico da tabela Delta (version, operation e metrics).
+        """
+        history = self.spark.sql(f"DESCRIBE HISTORY {table_name} LIMIT 1").collect()
+        if len(history) == 0:
+            return {}
+        return {"version": history[0].version,
+                "operation": history[0].operation,
+                "metrics": dict(history[0].operationMetrics or {})}
+
+    def get_operation_metrics(self, table_name: str) -> dict:
+        """
+        Retorna as métricas da última operação (operationMetrics) registradas no histórico da tabela Delta.
+        """
+        return self.get_last_operation(table_name).get("metrics", {})
+
+    def record_run_stats(self, table_name: str, **extra) -> dict:
+        """
+        Registra nas estatísticas da execução a última operação Delta da tabela. As contagens
+        vêm do histórico da tabela, sem executar novamente o plano do DataFrame gravado.
+
+        Returns:
+            dict: table, operation, version, rows (linhas gravadas ou linhas da origem do MERGE),
+                inserted, updated, deleted e os valores extras informados.
+        """
+        last = self.get_last_operation(table_name)
+        metrics = last.get("metrics", {})
+        merge = last.get("operation") == "MERGE"
+        stats = {"table": table_name,
+                 "operation": last.get("operation"),
+                 "version": last.get("version"),
+                 "rows": int(metrics.get("numSourceRows" if merge else "numOutputRows", 0)),
+                 "inserted": int(metrics.get("numTargetRowsInserted" if merge else "numOutputRows", 0)),
+                 "updated": int(metrics.get("numTargetRowsUpdated", 0)),
+                 "deleted": int(metrics.get("numTargetRowsDeleted", 0))}
+        stats.update(extra)
+        self.run_stats.append(stats)
+
+        line = f"{stats['operation']} {table_name}: {stats['rows']} registros"
+        if merge:
+            line += f" ({stats['inserted']} inseridos, {stats['updated']} atualizados, {stats['deleted']} removidos)"
+        if "embedding_cache_misses" in stats:
+            # Hit rate sobre as linhas consultadas no cache: no MERGE incremental, só os chunks novos
+            misses = stats["embedding_cache_misses"]
+            lookups = stats.get("embedding_cache_lookups", stats["rows"])
+            hit_rate = max(0.0, (lookups - misses) / lookups) if lookups > 0 else 0.0
+            line += f", cache de embedding: {misses} conteúdos novos (hit rate {hit_rate:.1%})"
+        print(line)
+        return stats
+
+    def get_run_stats(self) -> list:
+        """
+        Retorna as estatísticas das tabelas gravadas pelo último process.
+        """
+        return list(self.run_stats)
+
+    def print_run_stats(self):
+        total = sum(stats["rows"] for stats in self.run_stats)
+        print(f"Estatísticas da execução: {len(self.run_stats)} operações, {total} registros.")
+
 
 #################################################
 # AiLandingToBronzeProcessor
 #################################################
 class AiLandingToBronzeProcessor(AiLayerProcessor):
-    def __init__(self, catalog: str, spark, storage: AiStorage, context_size:int = 0, chunck_size: int = 1000, chunck_overlap: int = 200):
+    MANIFEST_TABLE = "ingestion_manifest"
+    # Status dos arquivos no manifesto de ingestão
+    STATUS_INGESTED = "INGESTED"
+    STATUS_SKIPPED = "SKIPPED"
+    STATUS_FAILED = "FAILED"
+    # Conversão pandas -> Spark dos blocos da extração no driver
+    ARROW_CONF = "spark.sql.execution.arrow.pyspark.enabled"
+
+    def __init__(self, catalog: str, spark, storage: AiStorage, context_size:int = 0, chunck_size: int = 1000, chunck_overlap: int = 200,
+                 max_io_workers: int = 8, max_cpu_workers: int = None, max_in_flight: int = 32,
+                 pdf_workers: int = 0, pdf_timeout: float = None, async_storage: AiAsyncStorage = None,
+                 metrics_path: str = None, flush_rows: int = 100000):
+        """
+        Args:
+            max_io_workers (int, optional): Threads para download dos arquivos e .metadata. Defaults to 8.
+            max_cpu_workers (int, optional): Processos para extração de PDF e split; 0 executa nas
+                threads de I/O. Defaults to None (os.cpu_count()).
+            max_in_flight (int, optional): Máximo de arquivos em andamento no pipeline. Defaults to 32.
+            pdf_workers (int, optional): Processos para extrair as páginas de cada PDF. Defaults to 0.
+            pdf_timeout (float, optional): Tempo máximo (segundos) de extração por PDF. Defaults to None.
+            async_storage (AiAsyncStorage, optional): Quando informado, a etapa de I/O da extração no
+                driver usa o storage assíncrono (mesmo base_path do storage). Defaults to None.
+            metrics_path (str, optional): Arquivo local onde o resumo das métricas de I/O do storage
+                é gravado em JSON ao final do process (storage com metrics). Defaults to None.
+            flush_rows (int, optional): Na extração no driver, linhas acumuladas antes de gravar um
+                bloco na bronze (o primeiro bloco usa o modo da gravação e os seguintes append);
+                0 ou None grava a sub categoria em um único bloco. Defaults to 100000.
+        """
         super().__init__(catalog, spark, storage.get_base_path())
         self.storage = storage
+        self.async_storage = async_storage
+        self.metrics_path = metrics_path
+        self.flush_rows = flush_rows
         self.context_size = context_size
         self.chunck_size = chunck_size
         self.chunck_overlap = chunck_overlap
+        self.pdf_workers = pdf_workers
+        self.pdf_timeout = pdf_timeout
+        self.engine = AiIngestionEngine(max_io_workers=max_io_workers,
+                                        max_cpu_workers=(os.cpu_count() or 1) if max_cpu_workers is None else max_cpu_workers,
+                                        max_in_flight=max_in_flight)
+
+    @staticmethod
+    def get_bronze_schema() -> StructType:
+        return StructType([
+            StructField("id", LongType(), nullable=True),
+            StructField("content", StringType(), nullable=False),
+            StructField("content_to_embed", StringType(), nullable=False),
+            StructField("metadata", MapType(StringType(), StringType()), nullable=False),
+            StructField("file_key", StringType(), nullable=False)
+        ])
+
+    def process(self, category_obj, extraction_date: str = "", has_extraction_path: bool = True, append: bool = False,
+                distributed: bool = False, incremental: bool = False):
+        """
+        Gera as tabelas bronze a partir dos arquivos da landing.
+
+        Na extração no driver, cada bloco de flush_rows linhas é um commit Delta: no modo overwrite
+        o primeiro bloco substitui a tabela e os seguintes são acrescentados, então durante a
+        gravação os leitores podem ver a sub categoria parcialmente gravada.
+
+        Args:
+            distributed (bool, optional): Lê os arquivos com o binaryFile do Spark e executa a extração
+                e o split nos executores (mapInPandas), sem trazer o conteúdo para o driver.
+                Defaults to False.
+            incremental (bool, optional): Usa o manifesto de ingestão da categoria para processar
+                somente arquivos novos ou alterados, atualizando as tabelas bronze no lugar.
+                Arquivos não suportados (SKIPPED) ou que falharam na extração (FAILED) também são
+                gravados no manifesto e só voltam a ser processados quando forem alterados.
+                Defaults to False.
+        """
+        try:
+            category_list = None
+            if isinstance(category_obj, list):
+                category_list = category_obj
+            else:
+                category_list = [category_obj]
+
+            df_tables = []
+            self.run_stats = []
+
+            for category in category_list:
+
+                full_path = AiLayerProcessor.LANDING_PATH + "/" + category
+                # Uma única listagem recursiva da categoria; a busca da extração mais nova e as
+                # listagens de sub categorias e arquivos abaixo são atendidas pela árvore em cache
+                self.storage.list_tree(full_path, refresh=True)
+                if has_extraction_path:
+                    full_path = self.get_newest_folder(full_path, extraction_date)
+            
+                print("folder: " + str(full_path))
+
+                if full_path is not None:
+                    sub_category_list = self.storage.list_path(full_path, type="PATH")
+
+                    # Cria um DataFrame Spark a partir da lista de dados
+                    schema = AiLandingToBronzeProcessor.get_bronze_schema()
+
+                    if incremental:
+                        manifest = self.load_manifest(category)
+                        self.delete_removed_sub_categories(category, sub_category_list, manifest)
+                    else:
+                        self.delete_table(category=category, sulfix=AiLayerProcessor.BRONZE_PATH)
+
+                    print("sub_category_list: " + str(len(sub_category_list)))
+                    for sub_category in sub_category_list:
+                        sub = os.path.basename(sub_category["name"])
+                        bronze_table = f"{self.catalog}.{category}.{sub}_{AiLayerProcessor.BRONZE_PATH}"
+                        file_list = self.storage.list_path(sub_category["name"], type="FILE")
+
+                        update_in_place = incremental and self.spark.catalog.tableExists(bronze_table)
+                        sub_manifest = manifest.get(sub, {}) if update_in_place else {}
+                        current = {os.path.basename(file["name"]): AiLandingToBronzeProcessor.get_fingerprint(file)
+                                   for file in file_list}
+                        changed_keys = [key for key, fingerprint in current.items() if sub_manifest.get(key) != fingerprint]
+                        removed_keys = [key for key in sub_manifest if key not in current]
+
+                        if update_in_place and len(changed_keys) == 0 and len(removed_keys) == 0:
+                            print(f"Sub categoria sem alterações: {sub}")
+                            continue
 
-    def process(self, category_obj, extraction_date: str = "", has_extraction_path: bool = True, append: bool = False):
-        category_list = None
-        if isinstance(category_obj, list):
-            category_list = category_obj
-        else:
-            category_list = [category_obj]
+                        file_list = [file for file in file_list if os.path.basename(file["name"]) in changed_keys]
+                        print(f"Sub categoria {sub}: {len(changed_keys)} arquivos novos/alterados, {len(removed_keys)} removidos")
 
-        df_tables = []
+                        # Índice consolidado de metadata da pasta (uma leitura por sub categoria)
+                        metadata_index = self.storage.load_metadata_index(sub_category["name"])
 
-        for category in category_list:
+                        if append or update_in_place:
+                            self.ensure_long_id(bronze_table)
+                        if update_in_place:
+                            # Remove da bronze as linhas dos arquivos alterados ou removidos
+                            self.delete_file_keys(bronze_table, changed_keys + removed_keys)
 
-            full_path = AiLayerProcessor.LANDING_PATH + "/" + category
-            if has_extraction_path:
-                full_path = self.get_newest_folder(full_path, extraction_date)
-            
-            print("folder: " + full_path)
-
-            if full_path is not None:
-                sub_category_list = self.storage.list_path(full_path, type="PATH")
-
-                # Cria um DataFrame Spark a partir da lista de dados
-                schema = StructType([
-                    StructField("id", StringType(), nullable=True),
-                    StructField("content", StringType(), nullable=False),
-                    StructField("content_to_embed", StringType(), nullable=False),
-                    StructField("metadata", MapType(StringType(), StringType()), nullable=False),
-                    StructField("file_key", StringType(), nullable=False)
-                ])
-
-                self.delete_table(category=category, sulfix=AiLayerProcessor.BRONZE_PATH)
-
-                print("sub_category_list: " + str(len(sub_category_list)))
-                for sub_category in sub_category_list:
-                    file_list = self.storage.list_path(sub_category["name"], type="FILE")
-                    data = []
-                    sub = os.path.basename(sub_category["name"])
-
-                    for file in file_list:
-                        text = None
-                        splitter = None
-                        if file["name"].lower().endswith(".pdf"):
-                            text = self.extract_pdf_to_text("", file["name"])
-                            splitter = AiTextSplitter(
-                                chunk_size=self.chunck_size,
-                                # Tamanho máximo do chunk em caracteres ou tokens aproximados
-                                chunk_overlap=self.chunck_overlap  # Sobreposição entre chunks
-                            )
-                        elif file["name"].lower().endswith(".txt"):
-                            text = self.extract_text(file["name"])
-                            splitter = AiTextSplitter(
-                                context_size=self.context_size,
-                                chunk_size=self.chunck_size,
-                                # Tamanho máximo do chunk em caracteres ou tokens aproximados
-                                chunk_overlap=self.chunck_overlap  # Sobreposição entre chunks
-                            )
-                        elif file["name"].lower().endswith(".md"):
-                            text = self.extract_text(file["name"])
-                            splitter = AiMarkdownSplitter(
-                                context_size=self.context_size,
-                                chunk_size=self.chunck_size,
-                                # Tamanho máximo do chunk em caracteres ou tokens aproximados
-                                chunk_overlap=self.chunck_overlap  # Sobreposição entre chunks
-                            )
-                        elif file["name"].lower().endswith(".json"):
-                            text = self.extract_text(file["name"])
-                            if '"openapi":' in text:
-                                splitter = AiOpenApiSplitter()
-                            else:
-                                splitter = AiJsonSplitter(
-                                    context_size=self.context_size
-                                )
+                        if distributed:
+                            batches = [(self.extract_distributed(sub_category["name"], category, sub, changed_keys, metadata_index),
+                                        None)]
                         else:
-                            print("Formato de arquivo não suportado: " + file["name"])
+                            batches = self.extract_on_driver(file_list, category, sub, schema, metadata_index)
+
+                        file_status = {}
+                        mode = "append" if (append or update_in_place) else "overwrite"
+                        for file_df, batch_status in batches:
+                            if file_df is not None:
+                                table_name = self.save_as_delta(df=AiLandingToBronzeProcessor.prepare_bronze(file_df),
+                                                                category=category, sub_category=sub,
+                                                                sulfix=AiLayerProcessor.BRONZE_PATH, mode=mode)
+                                # Contagem pelas métricas do Delta (um count() recalcularia toda a extração)
+                                self.record_run_stats(table_name)
+                                # Os blocos seguintes são acrescentados ao primeiro
+                                mode = "append"
+                            if batch_status is not None:
+                                file_status.update(batch_status)
+
+                        if incremental:
+                            if distributed:
+                                # Os executores não devolvem o status: os arquivos com linhas na bronze foram ingeridos
+                                file_status = self.get_file_status(table_name, changed_keys)
+                            self.save_manifest(category, sub, {key: (current[key], status) for key, status in file_status.items()},
+                                               changed_keys + removed_keys)
+
+                        df_tables.append(table_name)
+
+                        print("Tabela criada: " + table_name)
+
+            self.print_run_stats()
+            metrics = self.storage.get_metrics()
+            if metrics is not None:
+                metrics.print_summary()
+                if self.metrics_path is not None:
+                    metrics.to_json(self.metrics_path)
+
+            return df_tables
+        finally:
+            # Encerra os pools do pipeline, reaproveitados entre as sub categorias desta execução
+            # (o event loop continua ativo para os clientes do storage assíncrono)
+            self.engine.close_pools()
+            # Pools da extração de PDF criados nas threads do driver (max_cpu_workers = 0)
+            AiDocumentExtractor.close_pdf_pools()
+
+    @staticmethod
+    def prepare_bronze(file_df):
+        """
+        Normaliza os espaços do content e adiciona o id das linhas da bronze.
+        """
+        file_df = file_df.withColumn(
+            "content",
+            # Remove múltiplos espaços consecutivos
+            regexp_replace(
+                # Remove espaços no início e fim
+                trim(col("content")),
+                "\\s+", " "
+            )
+        )
+
+        file_df = file_df.withColumn(
+            "content",
+            # Converte caracteres Unicode de espaço para espaço normal (incluindo NBSP, tabs, etc)
+            regexp_replace(col("content"),
+                           "[\\u00A0\\u1680\\u180E\\u2000-\\u200B\\u202F\\u205F\\u3000\\uFEFF\\t\\n\\r\\f\\v]",
+                           " ")
+        )
+
+        # Adiciona o ID pelo hash da chunk_key única (chunks repetidos no arquivo recebem ids distintos)
+        file_df = AiLayerProcessor.with_unique_chunk_key(file_df.withColumn("chunk_key", AiLayerProcessor.get_chunk_key()),
+                                                         order_column=to_json(col("metadata")))
+        return file_df.withColumn("id", AiLayerProcessor.get_hash_id(col("chunk_key"))).drop("chunk_key")
+
+    def create_bronze_df(self, rows: list, schema: StructType):
+        """
+        Cria o DataFrame das linhas da bronze a partir de um DataFrame pandas (conversão pelo Arrow).
+        O Arrow é habilitado somente durante o createDataFrame e a configuração anterior da sessão
+        é restaurada em seguida.
+        """
+        for row in rows:
+            row["metadata"] = AiDocumentExtractor.stringify_metadata(row["metadata"])
+        pandas_df = pd.DataFrame(rows, columns=schema.fieldNames())
 
-                        if text is None:
-                            continue
+        previous = self.set_conf(AiLandingToBronzeProcessor.ARROW_CONF, "true")
+        try:
+            return self.spark.createDataFrame(pandas_df, schema=schema)
+        finally:
+            self.restore_conf(AiLandingToBronzeProcessor.ARROW_CONF, previous)
 
-                        metadata_path = (file["name"][:-len(os.path.basename(file["name"]))]) + "/.metadata/"
-                        metadata_name = os.path.basename(file["name"]) + ".metadata"
-                        metadata_json_default = self.storage.download_fileobj("", metadata_path + metadata_name)
+    def extract_on_driver(self, file_list: list, category: str, sub_category: str, schema: StructType, metadata_index: dict = None):
+        """
+        Extrai os arquivos da sub categoria no driver, pelo pipeline de ingestão.
 
-                        metadata = None
-                        if metadata_json_default is not None:
-                            metadata = json.loads(metadata_json_default)
-                        else:
-                            metadata = {}
+        As linhas são entregues em blocos de até flush_rows linhas (arquivos inteiros por bloco),
+        assim a sub categoria não fica inteira na memória do driver.
+
+        Args:
+            metadata_index (dict, optional): Índice de metadata da pasta (file_name -> metadata).
+
+        Yields:
+            tuple: DataFrame com as linhas da bronze do bloco e status dos arquivos concluídos desde o
+                bloco anterior (file_key -> INGESTED, SKIPPED ou FAILED). Uma sub categoria sem linhas
+                gera um único bloco vazio; o último bloco traz DataFrame None quando só restam status.
+        """
+        data = []
+        file_status = {}
+        flushed = False
+
+        process_fn = partial(AiDocumentExtractor.process_file, context_size=self.context_size,
+                             chunk_size=self.chunck_size, chunk_overlap=self.chunck_overlap,
+                             pdf_workers=self.pdf_workers, pdf_timeout=self.pdf_timeout)
+        fetch_fn = partial(self.fetch_file_async if self.async_storage is not None else self.fetch_file,
+                           category=category, sub_category=sub_category, metadata_index=metadata_index)
+
+        for result in self.engine.run(file_list, fetch_fn, process_fn):
+            file_key = os.path.basename(result["item"]["name"])
+            if result["error"] is not None:
+                print(f"Erro ao processar o arquivo {result['item']['name']}: {result['error']}")
+                file_status[file_key] = AiLandingToBronzeProcessor.STATUS_FAILED
+                continue
+
+            rows = result["result"] or []
+            file_status[file_key] = AiLandingToBronzeProcessor.get_status(file_key, len(rows) > 0)
+            if len(rows) == 0:
+                continue
+
+            data.extend(rows)
+            print("Arquivo processado: " + result["item"]["name"])
+
+            if self.flush_rows and len(data) >= self.flush_rows:
+                print(f"Gravando bloco de {len(data)} linhas de {sub_category}")
+                yield self.create_bronze_df(data, schema), file_status
+                data = []
+                file_status = {}
+                flushed = True
+
+        if len(data) > 0 or not flushed:
+            yield self.create_bronze_df(data, schema), file_status
+        elif len(file_status) > 0:
+            yield None, file_status
+
+    def extract_distributed(self, path: str, category: str, sub_category: str, file_keys: list = None, metadata_index: dict = None):
+        """
+        Extrai os arquivos da sub categoria nos executores.
+
+        Os arquivos são lidos com o binaryFile (pastas ocultas, como .metadata, são ignoradas
+        pelo Spark), o .metadata é associado por join e a extração e o split rodam em mapInPandas.
+
+        Args:
+            file_keys (list, optional): Restringe a extração a esses arquivos (nome do arquivo).
+            metadata_index (dict, optional): Índice de metadata da pasta; os arquivos fora do
+                índice usam o .metadata individual.
+        """
+        uri = self.storage.get_uri(path)
+
+        files_df = (self.spark.read.format("binaryFile").load(uri)
+                    .select(col("path"), col("content"),
+                            regexp_extract(col("path"), r"([^/]+)$", 1).alias("file_name")))
+        if file_keys is not None:
+            files_df = files_df.where(col("file_name").isin(file_keys))
+
+        metadata_index = metadata_index or {}
+        if len(metadata_index) > 0:
+            index_df = self.spark.createDataFrame(
+                [(name, json.dumps(metadata, ensure_ascii=False)) for name, metadata in metadata_index.items()],
+                schema=StructType([StructField("file_name", StringType(), False),
+                                   StructField("index_json", StringType(), True)]))
+            files_df = files_df.join(index_df, "file_name", "left")
+        else:
+            files_df = files_df.withColumn("index_json", lit(None).cast(StringType()))
+
+        if file_keys is not None and len(metadata_index) > 0 and all(key in metadata_index for key in file_keys):
+            # Todos os arquivos estão no índice: a leitura dos .metadata individuais é desnecessária
+            files_df = files_df.withColumn("metadata_json", col("index_json"))
+        else:
+            try:
+                metadata_df = (self.spark.read.format("binaryFile").option("pathGlobFilter", "*.metadata")
+                               .load(uri + "/.metadata")
+                               .select(regexp_extract(col("path"), r"([^/]+)\.metadata$", 1).alias("file_name"),
+                                       col("content").cast("string").alias("sidecar_json")))
+                files_df = (files_df.join(metadata_df, "file_name", "left")
+                            .withColumn("metadata_json", coalesce(col("index_json"), col("sidecar_json"))))
+            except Exception as e:
+                print(f"Pasta .metadata não encontrada em {uri}: {e}")
+                files_df = files_df.withColumn("metadata_json", col("index_json"))
 
-                        metadata["file_key"] = file["name"].split('/')[-1]
-                        metadata["category"] = category
-                        metadata["sub_category"] = sub
+        extract_fn = partial(AiDocumentExtractor.extract_batches, category=category, sub_category=sub_category,
+                             context_size=self.context_size, chunk_size=self.chunck_size,
+                             chunk_overlap=self.chunck_overlap, pdf_timeout=self.pdf_timeout,
+                             codec=self.storage.compression if self.storage.decompress else AiCodec.NONE)
 
-                        document_list = splitter.create_documents(text, metadata)
+        return (files_df.select("path", "content", "metadata_json")
+                .mapInPandas(extract_fn, schema=AiLandingToBronzeProcessor.get_bronze_schema()))
 
-                        # Adiciona cada bloco como uma linha no DataFrame
-                        for document in document_list:
-                            content = document.page_content.strip()
-                            content_to_embed = content
-                            if isinstance(document, SplitDocument):
-                                content_to_embed = document.content_to_embed
+    @staticmethod
+    def get_fingerprint(file: dict) -> str:
+        """
+        Identificador da versão do arquivo: ETag e tamanho no S3 ou tamanho, mtime e inode em disco.
+        """
+        if file.get("etag"):
+            return f"{file['etag']}:{file.get('size')}"
+        return f"{file.get('size')}:{file.get('last_modified')}:{file.get('inode')}"
 
-                            data.append({"id": None,
-                                         "content": content,
-                                         "content_to_embed": content_to_embed,
-                                         "metadata": document.metadata,
-                                         "file_key": document.metadata["file_key"]
-                                         })
+    @staticmethod
+    def get_status(file_key: str, has_rows: bool) -> str:
+        """
+        Status do arquivo no manifesto: INGESTED quando gerou linhas, SKIPPED quando o formato não
+        é suportado e FAILED nos demais casos (erro na leitura ou extração sem texto).
+        """
+        if has_rows:
+            return AiLandingToBronzeProcessor.STATUS_INGESTED
+        if not AiDocumentExtractor.is_supported(file_key):
+            return AiLandingToBronzeProcessor.STATUS_SKIPPED
+        return AiLandingToBronzeProcessor.STATUS_FAILED
 
-                        print("Arquivo processado: " + file["name"])
+    def get_file_status(self, table_name: str, file_keys: list) -> dict:
+        """
+        Status dos arquivos a partir das linhas gravadas na bronze (extração distribuída).
 
-                    file_df = self.spark.createDataFrame(data, schema=schema)
+        Returns:
+            dict: file_key -> INGESTED, SKIPPED ou FAILED.
+        """
+        if len(file_keys) == 0:
+            return {}
+        ingested = {row.file_key for row in self.spark.table(table_name)
+                    .where(col("file_key").isin(file_keys)).select("file_key").distinct().collect()}
+        return {key: AiLandingToBronzeProcessor.get_status(key, key in ingested) for key in file_keys}
 
-                    file_df = file_df.withColumn(
-                        "content",
-                        # Remove múltiplos espaços consecutivos
-                        regexp_replace(
-                            # Remove espaços no início e fim
-                            trim(col("content")),
-                            "\\s+", " "
-                        )
-                    )
+    def get_manifest_table(self, category: str) -> str:
+        return f"{self.catalog}.{category}.{AiLandingToBronzeProcessor.MANIFEST_TABLE}"
 
-                    file_df = file_df.withColumn(
-                        "content",
-                        # Converte caracteres Unicode de espaço para espaço normal (incluindo NBSP, tabs, etc)
-                        regexp_replace(col("content"),
-                                       "[\\u00A0\\u1680\\u180E\\u2000-\\u200B\\u202F\\u205F\\u3000\\uFEFF\\t\\n\\r\\f\\v]",
-                                       " ")
-                    )
+    def load_manifest(self, category: str) -> dict:
+        """
+        Carrega o manifesto de ingestão da categoria.
 
-                    # Adiciona ID sequencial
-                    window_spec = Window.orderBy(monotonically_increasing_id())
-                    final_df = file_df.withColumn("id", row_number().over(window_spec))
+        Returns:
+            dict: sub_category -> {file_key: fingerprint}.
+        """
+        manifest = {}
+        manifest_table = self.get_manifest_table(category)
+        if not self.spark.catalog.tableExists(manifest_table):
+            return manifest
 
-                    table_name = self.save_as_delta(df=final_df, category=category, sub_category=sub,
-                                                    sulfix=AiLayerProcessor.BRONZE_PATH,
-                                                    mode=("append" if (append) else "overwrite"))
+        for row in self.spark.table(manifest_table).collect():
+            manifest.setdefault(row.sub_category, {})[row.file_key] = row.fingerprint
+        return manifest
 
-                    df_tables.append(table_name)
+    def save_manifest(self, category: str, sub_category: str, entries: dict, deleted_keys: list):
+        """
+        Atualiza o manifesto da sub categoria: remove as chaves alteradas/removidas e grava as processadas.
 
-                    print(f"Total de registros processados: {final_df.count()}")
+        Args:
+            entries (dict): file_key -> (fingerprint, status).
+        """
+        manifest_table = self.get_manifest_table(category)
+        self.spark.sql(f"CREATE SCHEMA IF NOT EXISTS {self.catalog}.{category};")
+        self.spark.sql(f"CREATE TABLE IF NOT EXISTS {manifest_table} "
+                       "(sub_category STRING, file_key STRING, fingerprint STRING, status STRING, ingested_at TIMESTAMP) USING DELTA")
+        if not self.has_column(manifest_table, "status"):
+            # Manifestos anteriores só registravam os arquivos ingeridos
+            self.spark.sql(f"ALTER TABLE {manifest_table} ADD COLUMNS (status STRING)")
+
+        if len(deleted_keys) > 0:
+            view_name = "manifest_deleted_keys_" + uuid.uuid4().hex
+            self.spark.createDataFrame([(k,) for k in deleted_keys], "file_key STRING").createOrReplaceTempView(view_name)
+            try:
+                self.spark.sql(f"DELETE FROM {manifest_table} WHERE sub_category = '{sub_category}' "
+                               f"AND file_key IN (SELECT file_key FROM {view_name})")
+            finally:
+                self.spark.catalog.dropTempView(view_name)
 
-                    print("Tabela criada: " + table_name)
+        if len(entries) > 0:
+            (self.spark.createDataFrame([(sub_category, k, fingerprint, status) for k, (fingerprint, status) in entries.items()],
+                                        "sub_category STRING, file_key STRING, fingerprint STRING, status STRING")
+             .withColumn("ingested_at", current_timestamp())
+             .write.format("delta").mode("append").saveAsTable(manifest_table))
 
-        return df_tables
+            failed = [k for k, (_, status) in entries.items() if status != AiLandingToBronzeProcessor.STATUS_INGESTED]
+            if len(failed) > 0:
+                print(f"Sub categoria {sub_category}: {len(failed)} arquivos não ingeridos (SKIPPED/FAILED) registrados no manifesto")
 
-    def extract_pdf_to_text(self, file_path: str, file_name: str) -> str:
-        temp_file_path = None
+    def delete_file_keys(self, table_name: str, file_keys: list):
+        """
+        Remove da tabela as linhas dos arquivos informados.
+        """
+        if len(file_keys) == 0:
+            return
+        view_name = "bronze_deleted_keys_" + uuid.uuid4().hex
+        self.spark.createDataFrame([(k,) for k in file_keys], "file_key STRING").createOrReplaceTempView(view_name)
         try:
-            temp_file_path = self.storage.download_file(file_path, file_name)
+            self.spark.sql(f"DELETE FROM {table_name} WHERE file_key IN (SELECT file_key FROM {view_name})")
+        finally:
+            self.spark.catalog.dropTempView(view_name)
+
+    def delete_removed_sub_categories(self, category: str, sub_category_list: list, manifest: dict):
+        """
+        Remove as tabelas bronze e o manifesto das sub categorias que não existem mais na landing.
+        """
+        current = {os.path.basename(sub_category["name"]) for sub_category in sub_category_list}
+        for sub in manifest:
+            if sub not in current:
+                self.spark.sql(f"DROP TABLE IF EXISTS {self.catalog}.{category}.{sub}_{AiLayerProcessor.BRONZE_PATH}")
+                self.spark.sql(f"DELETE FROM {self.get_manifest_table(category)} WHERE sub_category = '{sub}'")
+                print("Sub categoria removida: " + sub)
+
+    def fetch_file(self, file: dict, category: str, sub_category: str, metadata_index: dict = None) -> dict:
+        """
+        Etapa de I/O da ingestão: baixa o arquivo e o seu .metadata.
+
+        Quando o arquivo está no índice de metadata da pasta, o .metadata individual não é lido.
 
+        Returns:
+            dict: name, metadata e text (ou pdf_bytes com o conteúdo do PDF) ou None
+                quando o arquivo não é suportado ou não pôde ser lido.
+        """
+        if not AiDocumentExtractor.is_supported(file["name"]):
+            print("Formato de arquivo não suportado: " + file["name"])
+            return None
+
+        payload = {"name": file["name"]}
+        if AiDocumentExtractor.is_pdf(file["name"]):
+            # Lê o PDF em memória direto do stream, sem arquivo temporário
+            payload["pdf_bytes"] = self.storage.read_bytes("", file["name"])
+            if payload["pdf_bytes"] is None:
+                return None
+        else:
+            payload["text"] = self.extract_text(file["name"])
+            if payload["text"] is None:
+                return None
+
+        index_entry = AiLandingToBronzeProcessor.get_index_entry(file["name"], metadata_index)
+        metadata_json = None
+        if index_entry is None:
+            metadata_json = self.storage.read_text("", AiLandingToBronzeProcessor.get_sidecar_name(file["name"]))
+        payload["metadata"] = AiDocumentExtractor.build_metadata(file["name"], category, sub_category,
+                                                                 index_entry, metadata_json)
+
+        return payload
+
+    async def fetch_file_async(self, file: dict, category: str, sub_category: str, metadata_index: dict = None) -> dict:
+        """
+        Versão assíncrona do fetch_file: o arquivo e o .metadata são lidos ao mesmo tempo pelo async_storage.
+        """
+        if not AiDocumentExtractor.is_supported(file["name"]):
+            print("Formato de arquivo não suportado: " + file["name"])
+            return None
+
+        index_entry = AiLandingToBronzeProcessor.get_index_entry(file["name"], metadata_index)
+        if index_entry is not None:
+            content = await self.async_storage.read("", file["name"])
+            metadata_json = None
+        else:
+            content, metadata_json = await asyncio.gather(
+                self.async_storage.read("", file["name"]),
+                self.async_storage.read_text("", AiLandingToBronzeProcessor.get_sidecar_name(file["name"])))
+        if content is None:
+            return None
+
+        payload = {"name": file["name"]}
+        if AiDocumentExtractor.is_pdf(file["name"]):
+            payload["pdf_bytes"] = content
+        else:
             try:
-                # Extrai o texto com codificação UTF-8
-                text = extract_text(temp_file_path, codec="utf-8")
+                payload["text"] = content.decode("utf-8")
+            except UnicodeDecodeError:
+                print(f"Erro: Não foi possível decodificar o arquivo {file['name']} usando a codificação 'utf-8'.")
+                return None
 
-                return text
-            except Exception as e:
-                print(f"Erro ao extrair texto com pdfminer.six: {e}")
+        payload["metadata"] = AiDocumentExtractor.build_metadata(file["name"], category, sub_category,
+                                                                 index_entry, metadata_json)
+
+        return payload
+
+    @staticmethod
+    def get_index_entry(file_name: str, metadata_index: dict = None) -> dict:
+        """
+        Entrada do arquivo no índice de metadata da pasta ou None (o .metadata individual precisa ser lido).
+        """
+        if metadata_index is None:
+            return None
+        return metadata_index.get(os.path.basename(file_name))
+
+    @staticmethod
+    def get_sidecar_name(file_name: str) -> str:
+        """
+        Caminho do .metadata individual do arquivo (pasta .metadata ao lado do arquivo).
+        """
+        file_key = os.path.basename(file_name)
+        return (file_name[:-len(file_key)]) + "/.metadata/" + file_key + ".metadata"
+
+    def extract_pdf_to_text(self, file_path: str, file_name: str) -> str:
+        stream = None
+        try:
+            # Stream com seek (GET Range no S3), consumido direto pelo pdfminer
+            stream = self.storage.open_stream(file_path, file_name, seekable=True)
+            if stream is None:
                 return None
-            finally:
-                # Remove o arquivo temporário
-                os.remove(temp_file_path)
+
+            return AiDocumentExtractor.extract_pdf(stream)
         except Exception as e:
             print(f"Erro ao processar o arquivo {file_name}: {e}")
             return None
         finally:
-
-            if temp_file_path is not None and os.path.exists(temp_file_path):
-                os.remove(temp_file_path)  # Garante que o arquivo temporário seja removido em caso de erro
+            if stream is not None:
+                stream.close()
 
     def extract_text(self, file_name):
         try:
-            text = self.storage.download_fileobj("", file_name)
+            text = self.storage.read_text("", file_name)
             return text
         except Exception as e:
             print(f"Ocorreu um erro inesperado: {e}")
@@ -262,11 +804,56 @@ class AiLandingToBronzeProcessor(AiLayerProcessor):
 # AiBronzeToSilverProcessor
 #################################################
 class AiBronzeToSilverProcessor(AiLayerProcessor):
-    def __init__(self, catalog: str, spark, bucket: str):
+    # Tamanho dos lotes Arrow entregues para a UDF de embedding em cada task
+    MAX_RECORDS_CONF = "spark.sql.execution.arrow.maxRecordsPerBatch"
+
+    def __init__(self, catalog: str, spark, bucket: str, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 embedding_batch_size: int = 64, max_records_per_batch: int = None,
+                 embedding_cache_table: str = None, embedding_cache_config: dict = None):
+        """
+        Args:
+            embedding_cache_table (str, optional): Tabela Delta (catalog.schema.tabela) usada como cache
+                de embeddings por (model_name, sha256(content_to_embed)).
+            embedding_cache_config (dict, optional): Configuração do AiEmbeddingCache local aberto
+                pela UDF em cada task (ex: SQLITE em disco local do executor). Os hits e misses desse
+                cache ficam nos executores e não aparecem nas estatísticas da execução; somente a
+                tabela de cache (embedding_cache_table) reporta o hit rate.
+        """
         super().__init__(catalog, spark, bucket)
+        self.model_name = model_name
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_cache_table = embedding_cache_table
+        self.cache_misses = None
+        self.cache_lookups = None
+        self.embeddings_udf = AiEmbedding.create_embeddings_iter_udf(model_name=model_name,
+                                                                     batch_size=embedding_batch_size,
+                                                                     cache_config=embedding_cache_config)
+        self.max_records_per_batch = max_records_per_batch
+
+    def process(self, category_obj, append: bool = False, incremental: bool = False):
+        """
+        Gera as tabelas silver (com embedding) a partir das tabelas bronze.
 
-    def process(self, category_obj, append: bool = False):
+        O max_records_per_batch vale somente durante o process: a configuração anterior da
+        sessão é restaurada ao final.
 
+        Args:
+            category_obj (str | list): Categoria ou lista de categorias.
+            append (bool, optional): Grava em modo append em vez de overwrite. Defaults to False.
+            incremental (bool, optional): Atualiza as tabelas silver existentes com MERGE, gerando
+                embedding somente dos chunks novos ou alterados e removendo os chunks que saíram
+                da bronze. Defaults to False.
+        """
+        if self.max_records_per_batch is None:
+            return self._process(category_obj, append, incremental)
+
+        previous = self.set_conf(AiBronzeToSilverProcessor.MAX_RECORDS_CONF, str(self.max_records_per_batch))
+        try:
+            return self._process(category_obj, append, incremental)
+        finally:
+            self.restore_conf(AiBronzeToSilverProcessor.MAX_RECORDS_CONF, previous)
+
+    def _process(self, category_obj, append: bool, incremental: bool):
         category_list = None
         if isinstance(category_obj, list):
             category_list = category_obj
@@ -274,6 +861,7 @@ class AiBronzeToSilverProcessor(AiLayerProcessor):
             category_list = [category_obj]
 
         df_tables = []
+        self.run_stats = []
 
         for category in category_list:
             tables_df = self.spark.sql(f"show tables in {self.catalog}.{category}")
@@ -282,48 +870,206 @@ class AiBronzeToSilverProcessor(AiLayerProcessor):
             table_names = [row.tableName for row in tables_df.collect() if
                            row.tableName.lower().endswith("_" + AiLayerProcessor.BRONZE_PATH)]
 
-            self.delete_table(category=category, sulfix=AiLayerProcessor.SILVER_PATH)
+            if incremental:
+                self.delete_orphan_tables(category, tables_df, table_names)
+            else:
+                self.delete_table(category=category, sulfix=AiLayerProcessor.SILVER_PATH)
 
             for table_name in table_names:
-                data_frame = self.spark.sql(f"select * from {self.catalog}.{category}.{table_name}")
-                # Define o nome do modelo embedding
-                # Aplica a UDF ao dataframe para criar a nova coluna com embeddings
-                chunked_df_with_embeddings = data_frame.withColumn("embedding", AiEmbedding.process_embeddings_udf(
-                    col("content_to_embed")))
-
-                # Para forçar a execução e verificar os resultados (usando collect() em vez de show() para debug inicial)
-                print(
-                    f"Processando: {table_name} - Total de registros processados: {chunked_df_with_embeddings.count()}")
+                data_frame = AiLayerProcessor.with_chunk_key(
+                    self.spark.sql(f"select * from {self.catalog}.{category}.{table_name}"))
 
                 sub = table_name[:((len(AiLayerProcessor.BRONZE_PATH) + 1) * -1)]
+                silver_table = f"{self.catalog}.{category}.{sub}_{AiLayerProcessor.SILVER_PATH}"
 
+                has_chunk_key = self.has_column(silver_table, "chunk_key")
+                if (incremental and has_chunk_key) or append:
+                    self.ensure_long_id(silver_table)
+
+                if incremental and has_chunk_key:
+                    table_name_silver = self.merge_incremental(data_frame, silver_table)
+                    df_tables.append(table_name_silver)
+                    print("Tabela atualizada: " + table_name_silver)
+                    continue
+
+                # Aplica a UDF ao dataframe para criar a nova coluna com embeddings; a gravação é a
+                # única ação sobre o DataFrame, então cada embedding é calculado uma única vez
+                print(f"Processando: {table_name}")
+                chunked_df_with_embeddings = self.embed(data_frame)
+
+                # Silver anterior à chunk_key (incremental): a regravação muda o schema (chunk_key,
+                # content_hash e embedding array<float>)
                 table_name_silver = self.save_as_delta(df=chunked_df_with_embeddings, category=category,
                                                        sub_category=sub, sulfix=AiLayerProcessor.SILVER_PATH,
-                                                       mode=("append" if (append) else "overwrite"))
+                                                       mode=("append" if (append) else "overwrite"),
+                                                       options=(None if append else {"overwriteSchema": "true"}))
+                self.record_run_stats(table_name_silver, **self.get_cache_stats())
 
                 df_tables.append(table_name_silver)
                 print("Tabela criada: " + table_name_silver)
 
+        self.print_run_stats()
         return df_tables
 
+    def delete_orphan_tables(self, category: str, tables_df, bronze_table_names: list):
+        """
+        Remove as tabelas silver cuja tabela bronze não existe mais.
+        """
+        silver_sulfix = "_" + AiLayerProcessor.SILVER_PATH
+        bronze_sulfix = "_" + AiLayerProcessor.BRONZE_PATH
+        bronze_subs = {name.lower()[:-len(bronze_sulfix)] for name in bronze_table_names}
+        for row in tables_df.collect():
+            name = row.tableName.lower()
+            if name.endswith(silver_sulfix) and name[:-len(silver_sulfix)] not in bronze_subs:
+                self.spark.sql(f"DROP TABLE IF EXISTS {self.catalog}.{category}.{row.tableName}")
+                print("Tabela removida: " + row.tableName)
+
+    def embed(self, data_frame):
+        """
+        Adiciona a coluna embedding, usando a tabela de cache quando configurada.
+        """
+        if self.embedding_cache_table is not None:
+            return self.embed_with_cache(data_frame)
+        return data_frame.withColumn("embedding", self.embeddings_udf(col("content_to_embed")))
+
+    def merge_incremental(self, data_frame, silver_table: str) -> str:
+        """
+        Atualiza a tabela silver com MERGE pela chunk_key.
+
+        Somente os chunks que ainda não existem na silver passam pelo embedding; os
+        existentes têm id e metadata atualizados e os que sumiram da bronze são removidos.
+        A chunk_key já é única (with_chunk_key), então nenhuma linha da bronze é descartada.
+        """
+        silver_keys = self.spark.table(silver_table).select("chunk_key")
+
+        # Os embeddings novos ficam em cache: o MERGE pode ler a origem mais de uma vez
+        # (merge.materializeSource=auto não materializa origens determinísticas do Delta)
+        new_df = (self.embed(data_frame.join(silver_keys, "chunk_key", "left_anti"))
+                  .select("chunk_key", "embedding")
+                  .persist(StorageLevel.MEMORY_AND_DISK))
+        # Materializa o cache antes do MERGE: esta é a única execução da UDF de embedding. O count
+        # são as linhas consultadas no cache (base do hit rate), pois os chunks existentes não passam pelo embed
+        lookups = new_df.count()
+        if self.cache_misses is not None:
+            self.cache_lookups = lookups
+        source_df = data_frame.join(new_df, "chunk_key", "left")
+
+        columns = [c for c in self.spark.table(silver_table).columns if c in source_df.columns]
+        insert_columns = ", ".join(columns)
+        insert_values = ", ".join("source." + c for c in columns)
+
+        view_name = "silver_source_" + uuid.uuid4().hex
+        source_df.createOrReplaceTempView(view_name)
+        try:
+            self.spark.sql(f"""
+                MERGE INTO {silver_table} AS target
+                USING {view_name} AS source
+                ON target.chunk_key = source.chunk_key
+                WHEN MATCHED AND (target.id <> source.id OR to_json(target.metadata) <> to_json(source.metadata)) THEN
+                    UPDATE SET target.id = source.id, target.metadata = source.metadata
+                WHEN NOT MATCHED THEN INSERT ({insert_columns}) VALUES ({insert_values})
+                WHEN NOT MATCHED BY SOURCE THEN DELETE
+            """)
+        finally:
+            self.spark.catalog.dropTempView(view_name)
+            new_df.unpersist()
+
+        self.record_run_stats(silver_table, **self.get_cache_stats())
+
+        return silver_table
+
+    def get_cache_stats(self) -> dict:
+        """
+        Retorna (e limpa) os conteúdos novos gravados no cache de embedding pelo último embed e,
+        no MERGE incremental, as linhas consultadas no cache (sem elas, todas as linhas gravadas).
+        """
+        misses = self.cache_misses
+        lookups = self.cache_lookups
+        self.cache_misses = None
+        self.cache_lookups = None
+        if misses is None:
+            return {}
+        stats = {"embedding_cache_misses": misses}
+        if lookups is not None:
+            stats["embedding_cache_lookups"] = lookups
+        return stats
+
+    def embed_with_cache(self, data_frame):
+        """
+        Gera a coluna embedding consultando primeiro a tabela de cache.
+
+        Somente os conteúdos ausentes do cache passam pela UDF; eles são gravados
+        no cache com MERGE e o resultado é montado com join no cache atualizado,
+        assim cada embedding é calculado uma única vez.
+        """
+        cache_table = self.embedding_cache_table
+        self.spark.sql(f"CREATE TABLE IF NOT EXISTS {cache_table} "
+                       "(model_name STRING, content_hash STRING, embedding ARRAY<FLOAT>) USING DELTA")
+
+        if "content_hash" not in data_frame.columns:
+            data_frame = data_frame.withColumn("content_hash", sha2(coalesce(col("content_to_embed"), lit("")), 256))
+
+        cache_df = self.spark.table(cache_table).where(col("model_name") == lit(self.model_name))
+        misses_df = (data_frame.select("content_hash", "content_to_embed")
+                     .dropDuplicates(["content_hash"])
+                     .join(cache_df.select("content_hash"), "content_hash", "left_anti"))
+
+        new_df = misses_df.select(lit(self.model_name).alias("model_name"), col("content_hash"),
+                                  self.embeddings_udf(col("content_to_embed")).alias("embedding"))
+
+        view_name = "embedding_cache_source_" + uuid.uuid4().hex
+        new_df.createOrReplaceTempView(view_name)
+        try:
+            self.spark.sql(f"""
+                MERGE INTO {cache_table} AS target
+                USING {view_name} AS source
+                ON target.model_name = source.model_name AND target.content_hash = source.content_hash
+                WHEN NOT MATCHED THEN INSERT *
+            """)
+        finally:
+            self.spark.catalog.dropTempView(view_name)
+
+        # O hit rate é calculado com o total de linhas das métricas da gravação da silver,
+        # sem um count() extra sobre a bronze
+        self.cache_misses = int(self.get_operation_metrics(cache_table).get("numTargetRowsInserted", 0))
+
+        # Lê novamente o cache para enxergar a versão gravada pelo MERGE
+        cache_df = (self.spark.table(cache_table).where(col("model_name") == lit(self.model_name))
+                    .select("content_hash", "embedding"))
+
+        return data_frame.join(cache_df, "content_hash", "left")
+
 
 #################################################
 # AiSilverToGoldProcessor
 #################################################
 class AiSilverToGoldProcessor(AiLayerProcessor):
+    # Colunas da gold comparadas no MERGE; o content faz parte da chunk_key
+    MERGE_UPDATE_COLUMNS = ["id_silver", "sub_category", "information_security_label", "page", "file_key",
+                            "reference_url", "position", "embedding"]
+
     def __init__(self, catalog: str, spark, bucket: str):
         super().__init__(catalog, spark, bucket)
 
-    def process(self, category_obj, schema: str, table: str, append: bool = False):
-
+    def process(self, category_obj, schema: str, table: str, append: bool = False, check_ids: bool = False):
+        """
+        Atualiza a tabela gold a partir das tabelas silver das categorias.
+
+        As tabelas silver de todas as categorias são resolvidas antes da gravação e unidas
+        em um único plano, gravado em um único commit. Quando a gold já existe com a coluna
+        chunk_key, a gravação é um MERGE por (table_name_silver, chunk_key): somente os chunks
+        novos, alterados ou removidos geram linhas no Change Data Feed. Na primeira carga ou
+        em uma gold sem chunk_key, a tabela é regravada (overwrite). Os totais vêm das
+        métricas da operação Delta, sem ações extras.
+
+        Args:
+            append (bool, optional): Grava em modo append, sem MERGE. Defaults to False.
+            check_ids (bool, optional): Verifica antes da gravação se os ids das linhas inseridas
+                colidem com outros ids (check_unique_ids), ao custo de uma ação extra. Defaults to False.
+        """
         sulfix = AiLayerProcessor.GOLD_PATH
-        df_gold = None
-        table_exists = False
-        max_id = 1
-        if self.spark.catalog.tableExists(f"{self.catalog}.{schema}.{table}_{sulfix}"):
-            table_exists = True
-            df = self.spark.sql(f"select max(id) as max from {self.catalog}.{schema}.{table}_{sulfix}")
-            max_id = df.collect()[0].max
+        gold_table = f"{self.catalog}.{schema}.{table}_{sulfix}"
+        table_exists = self.spark.catalog.tableExists(gold_table)
 
         category_list = None
         if isinstance(category_obj, list):
@@ -331,54 +1077,148 @@ class AiSilverToGoldProcessor(AiLayerProcessor):
         else:
             category_list = [category_obj]
 
-        window_spec = Window.orderBy(monotonically_increasing_id())
-        table_name = None
+        categories = ", ".join(f"'{category}'" for category in category_list)
+        self.run_stats = []
 
-        total = 0
+        silver_tables = []
         for category in category_list:
-            if table_exists or df_gold is not None:
-                self.spark.sql(f"delete from {self.catalog}.{schema}.{table}_{sulfix} where category='{category}'")
-                df_gold = self.spark.sql(f"select * from {self.catalog}.{schema}.{table}_{sulfix}")
-
-            catalog_schema = f"{self.catalog}.{category}"
-
-            tables_df = self.spark.sql(f"show tables in {catalog_schema}")
+            tables_df = self.spark.sql(f"show tables in {self.catalog}.{category}")
             # Extraia os nomes das tabelas do DataFrame
-            table_name_list = [row.tableName for row in tables_df.collect() if
-                               row.tableName.lower().endswith("_" + AiLayerProcessor.SILVER_PATH)]
-
-            for table_name in table_name_list:
-
-                df = self.spark.table(f"{catalog_schema}.{table_name}").select(
-                    col("id").alias("id_silver"),
-                    col("content"),
-                    col("content_to_embed"),
-                    col("metadata.category").alias("category"),
-                    col("metadata.sub_category").alias("sub_category"),
-                    col("metadata.information_security_label").alias("information_security_label"),
-                    col("metadata.page").alias("page"),
-                    col("metadata.file_key").alias("file_key"),
-                    col("metadata.reference_url").alias("reference_url"),
-                    col("metadata.position").alias("position"),
-                    col("embedding"),
-                    (row_number().over(window_spec) + lit(max_id)).cast(LongType()).alias("id"),
-                    lit(f"{catalog_schema}.{table_name}").alias("table_name_silver")
-                )
-
-                total = total + df.count()
-                if df_gold is None:
-                    df_gold = df
-                else:
-                    df_gold = df_gold.unionByName(df)
-
-            table_name = self.save_as_delta(df=df_gold, category=schema, sub_category=table, sulfix=sulfix,
-                                            mode=("append" if (append) else "overwrite"))
+            silver_tables.extend(f"{self.catalog}.{category}.{row.tableName}" for row in tables_df.collect()
+                                 if row.tableName.lower().endswith("_" + AiLayerProcessor.SILVER_PATH))
+
+        print(f"Tabelas silver: {len(silver_tables)}")
+        if len(silver_tables) == 0:
+            print("Nenhuma tabela silver encontrada.")
+            if table_exists and not append:
+                self.spark.sql(f"delete from {gold_table} where category in ({categories})")
+            return [gold_table]
+
+        df_gold = AiLayerProcessor.union_all([self.get_gold_source(silver_table) for silver_table in silver_tables])
+        merge = table_exists and not append and self.has_column(gold_table, "chunk_key")
+        if check_ids:
+            self.check_unique_ids(df_gold, gold_table, categories, table_exists, append, merge)
+
+        if merge:
+            self.merge_gold(df_gold, gold_table, categories)
+        else:
+            if table_exists and not append:
+                # Gold anterior à chunk_key: regrava a tabela uma vez com o novo schema, mantendo
+                # as outras categorias
+                print(f"Aviso: a tabela {gold_table} não possui chunk_key e será regravada uma única vez com o novo schema. "
+                      "O Change Data Feed registra todas as linhas e o Vector Search fará uma sincronização completa.")
+                df_gold = (self.spark.table(gold_table).where(f"category not in ({categories})")
+                           .unionByName(df_gold, allowMissingColumns=True))
+                self.save_as_delta(df=df_gold, category=schema, sub_category=table, sulfix=sulfix,
+                                   mode="overwrite", options={"overwriteSchema": "true"})
+            else:
+                self.save_as_delta(df=df_gold, category=schema, sub_category=table, sulfix=sulfix,
+                                   mode=("append" if (append and table_exists) else "overwrite"))
+            self.record_run_stats(gold_table)
 
         if not table_exists:
-            print(f"Habilitando Change Data Feed na tabela {table_name}...")
-            self.spark.sql(f"ALTER TABLE {table_name} SET TBLPROPERTIES (delta.enableChangeDataFeed = true)")
+            print(f"Habilitando Change Data Feed na tabela {gold_table}...")
+            self.spark.sql(f"ALTER TABLE {gold_table} SET TBLPROPERTIES (delta.enableChangeDataFeed = true)")
             print("Change Data Feed habilitado com sucesso.")
 
-        print(f"Total de registros processados: {total}")
-        print("Tabela criada: " + table_name)
-        return [table_name]
+        self.print_run_stats()
+        print("Tabela criada: " + gold_table)
+        return [gold_table]
+
+    def check_unique_ids(self, data_frame, gold_table: str, categories: str, table_exists: bool, append: bool,
+                         merge: bool):
+        """
+        Verifica, antes da gravação, se os ids (chave primária do Vector Search) das linhas inseridas
+        continuam únicos: repetidos entre si ou iguais a um id mantido na gold. No MERGE só as chaves
+        novas (o lado NOT MATCHED da origem) são verificadas, pois as existentes mantêm o id; uma
+        colisão do get_hash_id gera erro e nada é gravado.
+
+        Args:
+            categories (str): Categorias processadas, no formato da cláusula IN ('a', 'b').
+            merge (bool): A gravação é o MERGE do merge_gold.
+        """
+        new_df = data_frame
+        gold_ids = None
+        if table_exists:
+            gold_df = self.spark.table(gold_table)
+            if merge:
+                keys = ["table_name_silver", "chunk_key"]
+                new_df = new_df.join(gold_df.select(*keys), keys, "left_anti")
+            elif not append:
+                # Regravação: só as outras categorias são mantidas
+                gold_df = gold_df.where(f"category not in ({categories})")
+            gold_ids = gold_df.select("id")
+
+        new_ids = new_df.select("id")
+        duplicated = new_ids.groupBy("id").count().where(col("count") > 1).select("id")
+        if gold_ids is not None:
+            duplicated = duplicated.unionByName(new_ids.join(gold_ids, "id", "left_semi"))
+
+        ids = [row.id for row in duplicated.limit(5).collect()]
+        if len(ids) > 0:
+            return AiUtils.handler_error(f"Erro check_unique_ids: colisão de id na tabela {gold_table} "
+                                         f"(ids repetidos: {ids}). Nenhuma linha foi gravada.")
+
+    def get_gold_source(self, silver_table: str):
+        """
+        Seleciona as colunas da gold a partir de uma tabela silver.
+
+        A chunk_key é tornada única antes do cálculo do id, assim uma chave repetida na silver
+        gera chunks distintos na gold em vez de linhas descartadas no MERGE.
+        """
+        silver_df = self.spark.table(silver_table)
+        if "chunk_key" not in silver_df.columns:
+            silver_df = AiLayerProcessor.with_chunk_key(silver_df)
+        else:
+            silver_df = AiLayerProcessor.with_unique_chunk_key(silver_df, order_column=col("id"))
+
+        return silver_df.select(
+            col("id").alias("id_silver"),
+            col("content"),
+            col("content_to_embed"),
+            col("metadata.category").alias("category"),
+            col("metadata.sub_category").alias("sub_category"),
+            col("metadata.information_security_label").alias("information_security_label"),
+            col("metadata.page").alias("page"),
+            col("metadata.file_key").alias("file_key"),
+            col("metadata.reference_url").alias("reference_url"),
+            col("metadata.position").alias("position"),
+            col("embedding"),
+            AiLayerProcessor.get_hash_id(lit(silver_table), col("chunk_key")).alias("id"),
+            lit(silver_table).alias("table_name_silver"),
+            col("chunk_key")
+        )
+
+    def merge_gold(self, data_frame, gold_table: str, categories: str):
+        """
+        Atualiza as categorias na tabela gold com um único MERGE por (table_name_silver, chunk_key).
+
+        Os chunks existentes mantêm o id (chave primária do Vector Search) e só são atualizados
+        quando alguma coluna mudou; os chunks das categorias que não vieram das silver são removidos.
+        A chave (table_name_silver, chunk_key) já é única na origem (get_gold_source).
+
+        Args:
+            categories (str): Categorias processadas, no formato da cláusula IN ('a', 'b').
+        """
+        columns = [c for c in self.spark.table(gold_table).columns if c in data_frame.columns]
+        insert_columns = ", ".join(columns)
+        insert_values = ", ".join("source." + c for c in columns)
+        update_columns = [c for c in AiSilverToGoldProcessor.MERGE_UPDATE_COLUMNS if c in columns]
+        changed = " OR ".join(f"NOT (target.{c} <=> source.{c})" for c in update_columns)
+        update_set = ", ".join(f"target.{c} = source.{c}" for c in update_columns)
+
+        view_name = "gold_source_" + uuid.uuid4().hex
+        data_frame.createOrReplaceTempView(view_name)
+        try:
+            self.spark.sql(f"""
+                MERGE INTO {gold_table} AS target
+                USING {view_name} AS source
+                ON target.table_name_silver = source.table_name_silver AND target.chunk_key = source.chunk_key
+                WHEN MATCHED AND ({changed}) THEN UPDATE SET {update_set}
+                WHEN NOT MATCHED THEN INSERT ({insert_columns}) VALUES ({insert_values})
+                WHEN NOT MATCHED BY SOURCE AND target.category IN ({categories}) THEN DELETE
+            """)
+        finally:
+            self.spark.catalog.dropTempView(view_name)
+
+        self.record_run_stats(gold_table)
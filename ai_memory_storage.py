@@ -0,0 +1,260 @@
+import hashlib
+import io
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from tempfile import NamedTemporaryFile
+
+from .ai_codec import AiCodec
+from .ai_storage import AiStorage
+from .ai_storage_metrics import AiStorageMetrics
+from .ai_utils import AiUtils
+
+
+###################################
+# CLASS AiMemoryStorage
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiMemoryStorage(AiStorage):
+    """
+    Storage em memória (dict de bytes) com a semântica do S3, para testes e benchmarks.
+
+    As chaves seguem o formato do S3 (sem a raiz do disco) e o .metadata é gravado
+    na mesma convenção dos outros storages. Cada operação é contabilizada como a
+    requisição equivalente no S3 (GET, PUT, LIST, HEAD) junto com os bytes
+    transferidos, e pode ter uma latência simulada (latency_ms por requisição e
+    bandwidth_mbps por byte), o que permite medir os padrões de I/O do pipeline
+    de forma reproduzível. O get_uri não aponta para um local legível pelo Spark,
+    então a extração distribuída (binaryFile) não é suportada.
+    """
+    PAGE_SIZE = 1000
+    OPERATIONS = ("GET", "PUT", "LIST", "HEAD")
+
+    def __init__(self, config: dict):
+        """
+        Inicializa a classe AiMemoryStorage.
+
+        Args:
+            config (dict): Configurações para inicialiazação da classe
+                host (str, optional): DEFAULT: memory
+                base_path (str, optional): nome do "bucket". DEFAULT: memory
+                type (str): MEMORY
+                latency_ms (float, optional): latência simulada por requisição. DEFAULT: 0
+                bandwidth_mbps (float, optional): banda simulada (MB/s); 0 desativa. DEFAULT: 0
+        """
+        super().__init__(dict(config, host=config.get("host") or "memory", base_path=config.get("base_path") or "memory"))
+        self.latency_ms = config.get("latency_ms") or 0
+        self.bandwidth_mbps = config.get("bandwidth_mbps") or 0
+        self._objects = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def _get_key(self, file_path: str, file_name: str) -> str:
+        return AiUtils.sanitize_file_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name).strip("/")
+
+    def _request(self, operation: str, size: int = 0, key: str = None, outcome: str = AiStorageMetrics.OK):
+        """
+        Contabiliza a requisição, aplica a latência simulada e registra nas métricas.
+        """
+        with self._lock:
+            self._stats["requests"][operation] += 1
+            self._stats["bytes_in" if operation == "PUT" else "bytes_out"] += size
+
+        delay = self.latency_ms / 1000.0
+        if self.bandwidth_mbps > 0:
+            delay += size / (self.bandwidth_mbps * 1024 * 1024)
+        if delay > 0:
+            time.sleep(delay)
+        if self.metrics is not None:
+            self.metrics.record(operation, key, size, delay, outcome)
+
+    def _put(self, key: str, data: bytes, object_metadata: dict = None):
+        self._request("PUT", len(data), key)
+        with self._lock:
+            self._objects[key] = {"content": bytes(data),
+                                  "etag": hashlib.md5(data).hexdigest(),
+                                  "last_modified": datetime.now(timezone.utc).isoformat(),
+                                  "metadata": dict(object_metadata or {})}
+
+    def _get(self, key: str) -> dict:
+        with self._lock:
+            obj = self._objects.get(key)
+        self._request("GET", len(obj["content"]) if obj is not None else 0, key,
+                      AiStorageMetrics.OK if obj is not None else AiStorageMetrics.ERROR)
+        return obj
+
+    def get_stats(self) -> dict:
+        """
+        Retorna as requisições por operação, o total e os bytes enviados (bytes_in) e lidos (bytes_out).
+        """
+        with self._lock:
+            stats = {"requests": dict(self._stats["requests"]),
+                     "bytes_in": self._stats["bytes_in"],
+                     "bytes_out": self._stats["bytes_out"],
+                     "objects": len(self._objects)}
+        stats["total_requests"] = sum(stats["requests"].values())
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"requests": {operation: 0 for operation in AiMemoryStorage.OPERATIONS},
+                           "bytes_in": 0, "bytes_out": 0}
+
+    def clear(self):
+        """
+        Remove todos os objetos.
+        """
+        with self._lock:
+            self._objects.clear()
+        self.invalidate_listing()
+
+    # Override
+    def get_uri(self, path: str) -> str:
+        return "memory://" + AiUtils.sanitize_file_path(self.base_path + "/" + path)
+
+    # Override
+    def save(self, file_path: str, file_name: str, content: str, metadata: dict = None):
+        """
+        Salva um texto em memória (e o .metadata, quando informado).
+
+        Returns:
+            bool: True se a gravação for bem-sucedida, False caso contrário.
+        """
+        try:
+            object_metadata = {"ai-codec": self.compression} if self.compression != AiCodec.NONE else None
+            self._put(self._get_key(file_path, file_name), self._encode_content(content), object_metadata)
+            if metadata is not None:
+                self._put(self._get_key(file_path, ".metadata/" + file_name + ".metadata"), json.dumps(metadata).encode('utf-8'))
+            self.invalidate_listing()
+            return True
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado: {e}")
+            return False
+
+    # Override
+    def save_by_file(self, file_path: str, file_name: str, local_path: str, metadata: dict = None):
+        if not os.path.exists(local_path):
+            print(f"Erro: Arquivo local não encontrado em '{local_path}'")
+            return False
+
+        try:
+            target = io.BytesIO()
+            AiCodec.compress_file(local_path, target, self.compression, self.compression_level)
+            object_metadata = {"ai-codec": self.compression} if self.compression != AiCodec.NONE else None
+            self._put(self._get_key(file_path, file_name), target.getvalue(), object_metadata)
+            if metadata is not None:
+                self._put(self._get_key(file_path, ".metadata/" + file_name + ".metadata"), json.dumps(metadata).encode('utf-8'))
+            self.invalidate_listing()
+            return True
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado: {e}")
+            return False
+
+    # Override
+    def exists(self, file_path: str, file_name: str) -> bool:
+        key = self._get_key(file_path, file_name)
+        self._request("HEAD", 0, key)
+        with self._lock:
+            return key in self._objects
+
+    # Override
+    def open_stream(self, file_path: str, file_name: str, seekable: bool = False):
+        key = self._get_key(file_path, file_name)
+        obj = self._get(key)
+        if obj is None:
+            print(f"Erro: O arquivo '{key}' não foi encontrado.")
+            return None
+        return self._decode_stream(io.BytesIO(obj["content"]), AiCodec.from_metadata(obj["metadata"]), seekable)
+
+    # Override
+    def open_stream_if_changed(self, file_path: str, file_name: str, etag: str = None) -> dict:
+        key = self._get_key(file_path, file_name)
+        with self._lock:
+            obj = self._objects.get(key)
+        if obj is None:
+            self._request("GET", 0, key, AiStorageMetrics.ERROR)
+            print(f"Erro: O arquivo '{key}' não foi encontrado.")
+            return None
+        if etag is not None and etag == obj["etag"]:
+            # Equivalente ao 304 do S3: requisição sem corpo
+            self._request("GET", 0, key, AiStorageMetrics.NOT_MODIFIED)
+            return {"modified": False, "etag": etag, "stream": None}
+        self._request("GET", len(obj["content"]), key)
+        return {"modified": True, "etag": obj["etag"], "stream": io.BytesIO(obj["content"]),
+                "codec": AiCodec.from_metadata(obj["metadata"])}
+
+    # Override
+    def download_file(self, file_path: str, file_name: str, size: int = None):
+        """
+        Grava o conteúdo em um arquivo temporário (size não é usado).
+
+        Returns:
+            str: Caminho do arquivo temporário ou None quando o arquivo não existe.
+        """
+        content = self.read_bytes(file_path, file_name)
+        if content is None:
+            return None
+        base_p, ext = os.path.splitext(file_name)
+        with NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
+            temp_file.write(content)
+            return temp_file.name
+
+    def download_fileobj(self, file_path: str, file_name: str, encoding: str = "utf-8"):
+        return self.read_text(file_path, file_name, encoding)
+
+    def _list_keys(self, root: str) -> list:
+        p = (root + "/") if root != "" else ""
+        with self._lock:
+            keys = sorted((key, obj) for key, obj in self._objects.items() if key.startswith(p))
+        return p, keys
+
+    # Override
+    def _list_path(self, path: str, prefix: str = "", type: str = "") -> list:
+        root = self._get_list_root(path)
+        p, keys = self._list_keys(root)
+        p = AiUtils.sanitize_file_path(p + (prefix or ""))
+
+        files = []
+        folders = []
+        for key, obj in keys:
+            if not key.startswith(p):
+                continue
+            relative = key[len(p):]
+            if "/" in relative:
+                folder = p + relative.split("/")[0]
+                if not folders or folders[-1] != folder:
+                    folders.append(folder)
+            elif type != "PATH":
+                files.append({'name': key, 'type': "FILE", 'size': len(obj["content"]),
+                              'last_modified': obj["last_modified"], 'etag': obj["etag"]})
+
+        # Uma requisição LIST por página, como no list_objects_v2 com delimitador
+        self._request("LIST", 0, root)
+        for _ in range(max(0, math.ceil((len(files) + len(folders)) / AiMemoryStorage.PAGE_SIZE) - 1)):
+            self._request("LIST", 0, root)
+
+        if type != "FILE":
+            files.extend({'name': folder, 'type': "PATH"} for folder in folders)
+        return files
+
+    # Override
+    def _get_list_root(self, path: str) -> str:
+        return AiUtils.sanitize_file_path(path if path is not None else "").strip("/")
+
+    # Override
+    def _walk(self, root: str) -> list:
+        p, keys = self._list_keys(root)
+        entries = []
+        for key, obj in keys:
+            entries.append((key[len(p):].split("/"), {'name': key, 'type': "FILE", 'size': len(obj["content"]),
+                                                      'last_modified': obj["last_modified"], 'etag': obj["etag"]}))
+
+        self._request("LIST", 0, root)
+        for _ in range(max(0, math.ceil(len(entries) / AiMemoryStorage.PAGE_SIZE) - 1)):
+            self._request("LIST", 0, root)
+        return entries
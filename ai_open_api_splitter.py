@@ -22,6 +22,9 @@ class AiOpenApiSplitter(AiBaseTextSplitter):
         """
         Segmenta um dicionário Python carregado de um JSON OpenAPI em Documentos LangChain.
         """
+        if not isinstance(text, (str, bytes, bytearray)):
+            # Buffer mapeado em memória (mmap/memoryview): decodifica direto do buffer
+            text = str(text, "utf-8")
         openapi_data = json.loads(text)
         openapi_data = AiSplitterUtils.remove_ref_openapi_spec(openapi_data)
 
@@ -1,14 +1,31 @@
+import codecs
 import io
 import json
+import mmap
 import os
 import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import NamedTemporaryFile
 
 import boto3
 import botocore
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+from botocore.config import Config
+from s3transfer.subscribers import BaseSubscriber
 
+from .ai_codec import AiCodec
+from .ai_storage_metrics import AiStorageMetrics
 from .ai_utils import AiUtils
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: o índice de metadata fica protegido somente pelo lock do processo
+    fcntl = None
+
 
 ###################################
 # CLASS AiStorage
@@ -20,6 +37,10 @@ class AiStorage:
     """
     Classe base para interagir com o storage.
     """
+    METADATA_SIDECAR = "SIDECAR"
+    METADATA_INDEX = "INDEX"
+    METADATA_BOTH = "BOTH"
+    METADATA_INDEX_NAME = "_index.jsonl"
     def __init__(self, config):
         """
         Inicializa a classe AiStorage.
@@ -28,10 +49,33 @@ class AiStorage:
             config (dict): Configurações para inicialiazação da classe
                 host (str): path (quando for DISK) e zone (Quando for S3)
                 base_path (str): path (quando for DISK) e bucket e path (Quando for S3)
+                max_workers (int, optional): threads das operações em lote (save_many/download_many). DEFAULT: 16
+                metadata_layout (str, optional): (SIDECAR/INDEX/BOTH) onde o save_many grava o metadata:
+                    um .metadata por arquivo, um índice por pasta (.metadata/_index.jsonl) ou ambos. DEFAULT: SIDECAR
+                listing_ttl (int, optional): segundos em que a árvore do list_tree é reaproveitada pelo
+                    list_path; 0 desativa o cache. DEFAULT: 60
+                compression (str, optional): (NONE/GZIP/ZSTD) compressão do conteúdo no save/save_by_file. DEFAULT: NONE
+                compression_level (int, optional): nível de compressão do codec. DEFAULT: padrão do codec
+                decompress (bool, optional): descomprime de forma transparente nas leituras, pelo codec
+                    gravado no objeto (S3) ou pela compressão configurada (DISK). DEFAULT: True
+                metrics (AiStorageMetrics | bool, optional): registra as métricas de cada operação
+                    (True cria uma instância). DEFAULT: None
         """
         AiUtils.validate_config(config, ["host", "base_path"])
         self.host = "" if config["host"] is None else config["host"]
         self.base_path = "" if config["base_path"] is None else config["base_path"]
+        self.max_workers = config.get("max_workers") or 16
+        self.metadata_layout = (config.get("metadata_layout") or AiStorage.METADATA_SIDECAR).upper()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.listing_ttl = config.get("listing_ttl") if config.get("listing_ttl") is not None else 60
+        self._listing_cache = {}
+        self._listing_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self.compression = AiCodec.normalize(config.get("compression"))
+        self.compression_level = config.get("compression_level")
+        self.decompress = config.get("decompress") if config.get("decompress") is not None else True
+        self.metrics = AiStorageMetrics() if config.get("metrics") is True else (config.get("metrics") or None)
 
     @staticmethod
     def get_instance(config:dict):
@@ -42,15 +86,50 @@ class AiStorage:
             config (dict): Configurações para inicialiazação da classe
                 host (str): path (quando for DISK) e zone (Quando for S3)
                 base_path (str): path (quando for DISK) e bucket e path (Quando for S3)
-                type (str): (DISK/AWS) DEFAULT: DISK
+                type (str): (DISK/AWS/MEMORY) DEFAULT: DISK
+                cache (dict, optional): ativa o cache local de leitura (ver AiCachedStorage)
         """
+        if config.get("cache") is not None:
+            # Import tardio: ai_cached_storage depende deste módulo
+            from .ai_cached_storage import AiCachedStorage
+            return AiCachedStorage(AiStorage.get_instance(dict(config, cache=None)), config["cache"])
+
         if ((config["type"].upper() if config["type"] is not None else "DISK") == "AWS"):
             return AiAwsStorage(config)            
+        elif ((config["type"] or "").upper() == "MEMORY"):
+            # Import tardio: ai_memory_storage depende deste módulo
+            from .ai_memory_storage import AiMemoryStorage
+            return AiMemoryStorage(config)
         else:
             return AiDiskStorage(config)
     
     def get_base_path(self):
         return self.base_path
+
+    def get_metrics(self) -> AiStorageMetrics:
+        """
+        Retorna as métricas de I/O do storage (None quando não configuradas).
+        """
+        return self.metrics
+
+    def _record(self, operation:str, key:str, bytes:int = 0, start:float = None, outcome:str = AiStorageMetrics.OK):
+        """
+        Registra a operação nas métricas (start é o time.perf_counter() do início da operação).
+        """
+        if self.metrics is not None:
+            self.metrics.record(operation, key, bytes, (time.perf_counter() - start) if start is not None else 0.0, outcome)
+
+    def get_uri(self, path:str) -> str:
+        """
+        Retorna a URI do caminho (no formato retornado pelo list_path) para leitura pelo Spark.
+
+        Args:
+            path (str): caminho retornado pelo list_path.
+
+        Returns:
+            str: URI completa (ex: s3://bucket/path ou file:/caminho/absoluto em disco).
+        """
+        raise Exception("method not implemented.")
     
     def save(self, file_path:str, file_name:str, content:str, metadata:dict = None):
         """
@@ -81,6 +160,9 @@ class AiStorage:
         """
         Lista todos os arquivos e subpastas (prefixos) dentro de uma path.
 
+        Quando a path está dentro de uma árvore carregada pelo list_tree (e dentro do
+        listing_ttl), o resultado vem da árvore, sem nova listagem no storage.
+
         Args:
             path (str): pasta para busca ''.
             prefix (str, optional): Um prefixo para filtrar os resultados. Defaults para ''.
@@ -88,11 +170,355 @@ class AiStorage:
 
         Returns:
             list : Lista todos os arquivos e subpastas (prefixos) dentro de uma path. 
+                Os arquivos (FILE) trazem também size, last_modified e etag (S3) ou inode (DISK).
+                Uma path que não existe na árvore em cache retorna lista vazia.
+        """
+        tree = self._get_cached_tree(self._get_list_root(path))
+        if tree is None:
+            return self._list_path(path, prefix, type)
+
+        if tree.get("children") is None:
+            # Pasta fora da árvore: lista vazia, como a listagem de um prefixo inexistente no S3
+            return []
+
+        files = []
+        for name, node in tree["children"].items():
+            if not name.startswith(prefix or ""):
+                continue
+            if node["type"] == "FILE" and type != "PATH":
+                files.append(dict(node))
+            elif node["type"] == "PATH" and type != "FILE":
+                files.append({'name': node["name"], 'type': "PATH"})
+        return files
+
+    def _list_path(self, path:str, prefix:str="", type:str="") -> list:
+        """
+        Listagem de um nível no storage (implementada por cada backend).
+        """
+        raise Exception("method not implemented.")
+
+    def list_tree(self, path:str, refresh:bool=False) -> dict:
+        """
+        Lista recursivamente a path com uma única varredura (listagem sem delimitador no S3,
+        os.scandir em disco) e guarda a árvore por listing_ttl segundos.
+
+        Args:
+            path (str): pasta raiz da listagem.
+            refresh (bool, optional): Ignora a árvore em cache. Defaults to False.
+
+        Returns:
+            dict: Nó raiz {name, type: PATH, children: {nome: nó}}; os nós FILE têm os mesmos
+                campos do list_path (size, last_modified, etag/inode). None em caso de erro.
+        """
+        root = self._get_list_root(path)
+        if not refresh:
+            tree = self._get_cached_tree(root)
+            if tree is not None:
+                return tree
+
+        entries = self._walk(root)
+        if entries is None:
+            return None
+
+        tree = {"name": root, "type": "PATH", "children": {}}
+        for parts, entry in entries:
+            node = tree
+            for part in parts[:-1]:
+                node = node["children"].setdefault(part, {"name": AiStorage._join_name(node["name"], part),
+                                                          "type": "PATH", "children": {}})
+            if entry["type"] == "FILE":
+                node["children"][parts[-1]] = entry
+            else:
+                node["children"].setdefault(parts[-1], {"name": entry["name"], "type": "PATH", "children": {}})
+
+        if self.listing_ttl > 0:
+            with self._listing_lock:
+                self._listing_cache[root] = (time.monotonic() + self.listing_ttl, tree)
+        return tree
+
+    def invalidate_listing(self, path:str = None):
+        """
+        Descarta as árvores em cache (todas ou as que contêm a path).
+        """
+        with self._listing_lock:
+            if path is None:
+                self._listing_cache.clear()
+                return
+            key = self._get_list_root(path)
+            for root in list(self._listing_cache):
+                if root == "" or key == root or key.startswith(root + "/") or root.startswith(key + "/"):
+                    del self._listing_cache[root]
+
+    def _get_cached_tree(self, key:str) -> dict:
+        """
+        Retorna o nó da key dentro de uma árvore válida em cache ({} sem children quando a
+        key não existe na árvore) ou None quando nenhuma árvore cobre a key.
+        """
+        with self._listing_lock:
+            now = time.monotonic()
+            for root, (expires_at, tree) in list(self._listing_cache.items()):
+                if expires_at < now:
+                    del self._listing_cache[root]
+                    continue
+                if key == root:
+                    return tree
+                if root == "" or key.startswith(root + "/"):
+                    node = tree
+                    for part in key[len(root):].strip("/").split("/"):
+                        node = (node.get("children") or {}).get(part)
+                        if node is None or node["type"] != "PATH":
+                            return {}
+                    return node
+        return None
+
+    @staticmethod
+    def _join_name(name:str, part:str) -> str:
+        return AiUtils.sanitize_file_path(name + "/" + part) if name != "" else part
+
+    def _get_list_root(self, path:str) -> str:
+        """
+        Normaliza a path para o formato dos nomes retornados pelo list_path.
+        """
+        raise Exception("method not implemented.")
+
+    def _walk(self, root:str) -> list:
+        """
+        Varre recursivamente a root.
+
+        Returns:
+            list: Tuplas (partes do caminho relativo à root, entrada no formato do list_path).
         """
         raise Exception("method not implemented.")
     
     def download_file(self, file_path:str, file_name:str, local_path:str):
         raise Exception("method not implemented.")
+
+    def open_stream(self, file_path:str, file_name:str, seekable:bool = False):
+        """
+        Abre o arquivo para leitura em streaming, sem arquivo temporário.
+
+        Args:
+            file_path (str): O caminho do arquivo.
+            file_name (str): O nome do arquivo.
+            seekable (bool, optional): Retorna um objeto com seek (no S3 via GETs com Range). Defaults to False.
+
+        Returns:
+            file-like: Objeto binário para leitura ou None em caso de erro.
+        """
+        raise Exception("method not implemented.")
+
+    def open_stream_if_changed(self, file_path:str, file_name:str, etag:str = None) -> dict:
+        """
+        Leitura condicional: só abre o arquivo quando a versão atual é diferente do etag informado.
+
+        Args:
+            file_path (str): O caminho do arquivo.
+            file_name (str): O nome do arquivo.
+            etag (str, optional): Versão já conhecida (ex: a que está no cache).
+
+        Returns:
+            dict: modified (bool), etag (versão atual), stream (conteúdo como gravado, sem
+                descompressão; None quando não mudou) e codec do conteúdo, ou None em caso de erro.
+        """
+        raise Exception("method not implemented.")
+
+    def _encode_content(self, content:str) -> bytes:
+        """
+        Codifica o texto em UTF-8 e aplica a compressão configurada.
+        """
+        return AiCodec.compress(content.encode('utf-8'), self.compression, self.compression_level)
+
+    def _decode_stream(self, stream, codec:str, seekable:bool = False):
+        """
+        Aplica a descompressão transparente ao stream de leitura (codec com que o arquivo foi gravado).
+        """
+        if stream is None or not self.decompress:
+            return stream
+        return AiCodec.wrap_stream(stream, codec, seekable)
+
+    def _decode_file(self, local_path:str, codec:str):
+        """
+        Descomprime no lugar um arquivo local baixado comprimido.
+        """
+        if self.decompress:
+            AiCodec.decompress_file(local_path, codec)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        Pool de threads compartilhado pelas operações em lote da instância.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def save_many(self, items:list) -> list:
+        """
+        Salva vários conteúdos em paralelo.
+
+        Args:
+            items (list): Lista de dict com file_path, file_name, content e metadata (opcional).
+
+        Returns:
+            list: Resultado por item, na mesma ordem: file_path, file_name, success e error.
+        """
+        write_sidecar = self.metadata_layout != AiStorage.METADATA_INDEX
+
+        def save_item(item):
+            try:
+                success = self.save(item.get("file_path"), item["file_name"], item["content"],
+                                    item.get("metadata") if write_sidecar else None)
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "success": success, "error": None}
+            except Exception as e:
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "success": False, "error": str(e)}
+
+        results = list(self._get_executor().map(save_item, items))
+        self._save_metadata_indexes(items, results)
+        self.invalidate_listing()
+        return results
+
+    def _save_metadata_indexes(self, items:list, results:list):
+        """
+        Grava o índice de metadata de cada pasta dos itens salvos com sucesso (layouts INDEX/BOTH).
+        """
+        if self.metadata_layout == AiStorage.METADATA_SIDECAR:
+            return
+
+        folders = {}
+        for item, result in zip(items, results):
+            if result["success"] and item.get("metadata") is not None:
+                folders.setdefault(item.get("file_path") or "", {})[item["file_name"]] = item["metadata"]
+
+        for file_path, entries in folders.items():
+            self.save_metadata_index(file_path, entries)
+
+    def save_metadata_index(self, file_path:str, entries:dict) -> bool:
+        """
+        Grava (mesclando com o existente) o índice de metadata da pasta em .metadata/_index.jsonl.
+
+        A leitura, a mescla e a gravação acontecem sob o lock do storage, para que gravações
+        concorrentes do mesmo processo não percam entradas; DISK e AWS também protegem a
+        atualização entre processos (_update_metadata_index).
+
+        Args:
+            file_path (str): Pasta dos arquivos.
+            entries (dict): file_name -> metadata.
+        """
+        with self._index_lock:
+            return self._update_metadata_index(file_path, entries)
+
+    def _update_metadata_index(self, file_path:str, entries:dict) -> bool:
+        """
+        Lê, mescla e grava o índice de metadata da pasta.
+        """
+        index = self.load_metadata_index(file_path)
+        index.update(entries)
+        return self.save(AiStorage._get_metadata_folder(file_path), AiStorage.METADATA_INDEX_NAME,
+                         AiStorage._format_metadata_index(index))
+
+    def load_metadata_index(self, file_path:str) -> dict:
+        """
+        Carrega o índice de metadata da pasta, quando existir.
+
+        Returns:
+            dict: file_name -> metadata (vazio quando a pasta não tem índice).
+        """
+        folder = AiStorage._get_metadata_folder(file_path)
+        if not self.exists(folder, AiStorage.METADATA_INDEX_NAME):
+            return {}
+
+        return AiStorage._parse_metadata_index(self.read_text(folder, AiStorage.METADATA_INDEX_NAME))
+
+    @staticmethod
+    def _get_metadata_folder(file_path:str) -> str:
+        return ((file_path + "/") if file_path is not None and file_path != "" else "") + ".metadata"
+
+    @staticmethod
+    def _format_metadata_index(index:dict) -> str:
+        return "\n".join(json.dumps({"file_name": name, "metadata": metadata}, ensure_ascii=False)
+                         for name, metadata in index.items())
+
+    @staticmethod
+    def _parse_metadata_index(content:str) -> dict:
+        index = {}
+        for line in (content or "").splitlines():
+            if line.strip() != "":
+                entry = json.loads(line)
+                index[entry["file_name"]] = entry["metadata"]
+        return index
+
+    def exists(self, file_path:str, file_name:str) -> bool:
+        """
+        Verifica se o arquivo existe.
+        """
+        raise Exception("method not implemented.")
+
+    def download_many(self, items:list, encoding:str="utf-8", mode:str="TEXT") -> list:
+        """
+        Lê vários arquivos em paralelo.
+
+        Args:
+            items (list): Lista de dict com file_path e file_name.
+            encoding (str, optional): Codificação dos arquivos no modo TEXT. Defaults to "utf-8".
+            mode (str, optional): TEXT (content em str), BYTES (content em bytes) ou FILE (content com
+                o caminho do arquivo temporário do download_file, removido pelo chamador; o size do
+                item, quando informado, é repassado ao download_file). Defaults to "TEXT".
+
+        Returns:
+            list: Resultado por item, na mesma ordem: file_path, file_name, content e error.
+        """
+        if mode == "BYTES":
+            read_fn = lambda item: self.read_bytes(item.get("file_path"), item["file_name"])
+        elif mode == "FILE":
+            # O size do item (ex: vindo do list_path) evita a consulta do tamanho no S3
+            read_fn = lambda item: self.download_file(item.get("file_path"), item["file_name"], item.get("size"))
+        elif mode == "TEXT":
+            read_fn = lambda item: self.read_text(item.get("file_path"), item["file_name"], encoding)
+        else:
+            return AiUtils.handler_error(f"Erro download_many: modo '{mode}' inválido (TEXT, BYTES ou FILE).")
+
+        def download_item(item):
+            try:
+                content = read_fn(item)
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "content": content,
+                        "error": None if content is not None else "not found"}
+            except Exception as e:
+                return {"file_path": item.get("file_path"), "file_name": item["file_name"], "content": None, "error": str(e)}
+
+        return list(self._get_executor().map(download_item, items))
+
+    def read_bytes(self, file_path:str, file_name:str) -> bytes:
+        """
+        Lê todo o conteúdo do arquivo.
+
+        Returns:
+            bytes: Conteúdo do arquivo ou None em caso de erro.
+        """
+        stream = self.open_stream(file_path, file_name)
+        if stream is None:
+            return None
+        try:
+            return stream.read()
+        finally:
+            stream.close()
+
+    def read_text(self, file_path:str, file_name:str, encoding:str="utf-8") -> str:
+        """
+        Lê o arquivo como texto, decodificando direto do stream.
+
+        Returns:
+            str: Conteúdo do arquivo ou None em caso de erro.
+        """
+        stream = self.open_stream(file_path, file_name)
+        if stream is None:
+            return None
+        try:
+            return codecs.getreader(encoding)(stream).read()
+        except UnicodeDecodeError:
+            print(f"Erro: Não foi possível decodificar o arquivo usando a codificação '{encoding}'.")
+            return None
+        finally:
+            stream.close()
 ###################################
 # CLASS AiDiskStorage
 # Author: Leonaro Cabral
@@ -103,6 +529,7 @@ class AiDiskStorage(AiStorage):
     """
     Classe para interagir com o arquivos em disco
     """
+    MMAP_THRESHOLD = 1024 * 1024
     def __init__(self, config:dict):
         """
         Inicializa a classe AiDiskStorage.
@@ -112,8 +539,225 @@ class AiDiskStorage(AiStorage):
                 host (str): path no disco
                 base_path (str): path2 no disco
                 type (str): DISK
+                mmap_threshold (int, optional): a partir desse tamanho (bytes) as leituras usam mmap. DEFAULT: 1MB
         """
         super().__init__(config)
+        self.mmap_threshold = config.get("mmap_threshold") if config.get("mmap_threshold") is not None else AiDiskStorage.MMAP_THRESHOLD
+
+    # Override
+    def get_uri(self, path:str) -> str:
+        """
+        URI file: do caminho local; sem o esquema, o Spark no Databricks resolveria o caminho no DBFS.
+        """
+        return "file:" + self._get_local_path(path)
+
+    def _get_local_path(self, path:str) -> str:
+        """
+        Caminho local absoluto (host + base_path) no formato retornado pelo list_path.
+        """
+        root = AiUtils.sanitize_file_path(self.host + "/" + self.base_path + "/")
+        path = AiUtils.sanitize_file_path(path)
+        if path.startswith(root):
+            return path
+        return AiUtils.sanitize_file_path(root + path)
+
+    def _get_full_path(self, file_path:str, file_name:str) -> str:
+        return self._get_local_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
+
+    # Override
+    def exists(self, file_path:str, file_name:str) -> bool:
+        start = time.perf_counter()
+        file = self._get_full_path(file_path, file_name)
+        result = os.path.isfile(file)
+        self._record("HEAD", file, 0, start)
+        return result
+
+    # Override
+    def _update_metadata_index(self, file_path:str, entries:dict) -> bool:
+        """
+        Atualiza o índice sob um lock de arquivo (flock em .metadata/_index.jsonl.lock), compartilhado
+        entre processos, e grava em um arquivo temporário renomeado sobre o índice (os.replace), então
+        leitores nunca veem um índice parcial.
+        """
+        folder = AiStorage._get_metadata_folder(file_path)
+        index_file = self._get_full_path(folder, AiStorage.METADATA_INDEX_NAME)
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+
+        with open(index_file + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                index = self.load_metadata_index(file_path)
+                index.update(entries)
+                temp_name = f"{AiStorage.METADATA_INDEX_NAME}.{uuid.uuid4().hex}.tmp"
+                if not self.save(folder, temp_name, AiStorage._format_metadata_index(index)):
+                    return False
+                os.replace(self._get_full_path(folder, temp_name), index_file)
+                return True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    # Override
+    def open_stream_if_changed(self, file_path:str, file_name:str, etag:str = None) -> dict:
+        start = time.perf_counter()
+        file = self._get_full_path(file_path, file_name)
+        try:
+            # Em disco a versão é derivada do tamanho e da data de modificação
+            stat = os.stat(file)
+            current = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+            if etag is not None and etag == current:
+                self._record("GET", file, 0, start, AiStorageMetrics.NOT_MODIFIED)
+                return {"modified": False, "etag": current, "stream": None}
+            stream = open(file, "rb")
+            self._record("GET", file, stat.st_size, start)
+            return {"modified": True, "etag": current, "stream": stream, "codec": self._get_codec(stream)}
+        except FileNotFoundError:
+            self._record("GET", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: O arquivo '{file}' não foi encontrado.")
+            return None
+        except Exception as e:
+            self._record("GET", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Ocorreu um erro inesperado: {e}")
+            return None
+
+    # Override
+    def open_stream(self, file_path:str, file_name:str, seekable:bool = False):
+        """
+        Abre o arquivo para leitura. Arquivos a partir do mmap_threshold são mapeados em
+        memória (o mmap tem read, seek e tell), e as leituras vêm direto do page cache.
+        Arquivos comprimidos são descomprimidos durante a leitura.
+        """
+        stream = self._open_raw(file_path, file_name)
+        return self._decode_stream(stream, self._get_codec(stream), seekable)
+
+    def _get_codec(self, stream) -> str:
+        """
+        Codec do arquivo: em disco não há metadata por arquivo, então vale a compressão configurada,
+        confirmada pelos bytes iniciais (arquivos gravados fora do storage são lidos como estão).
+        """
+        if stream is None or self.compression == AiCodec.NONE:
+            return AiCodec.NONE
+        if isinstance(stream, mmap.mmap):
+            return AiCodec.resolve(stream[:AiCodec.HEADER_SIZE], self.compression)
+        header = stream.read(AiCodec.HEADER_SIZE)
+        stream.seek(0)
+        return AiCodec.resolve(header, self.compression)
+
+    def _open_raw(self, file_path:str, file_name:str):
+        """
+        Abre o arquivo sem descompressão (mmap a partir do mmap_threshold).
+        """
+        start = time.perf_counter()
+        file = self._get_full_path(file_path, file_name)
+        try:
+            stream = open(file, "rb")
+            size = os.fstat(stream.fileno()).st_size
+            self._record("GET", file, size, start)
+            if size == 0 or size < self.mmap_threshold:
+                return stream
+            try:
+                return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            finally:
+                # O mapeamento continua válido depois que o descritor é fechado
+                stream.close()
+        except FileNotFoundError:
+            self._record("GET", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: O arquivo '{file}' não foi encontrado.")
+            return None
+        except PermissionError:
+            self._record("GET", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: Permissão negada para acessar o arquivo '{file}'.")
+            return None
+
+    def read_buffer(self, file_path:str, file_name:str) -> memoryview:
+        """
+        Retorna o conteúdo do arquivo sem cópia: memoryview sobre o arquivo mapeado em memória
+        (ou sobre os bytes lidos, abaixo do mmap_threshold). Splitters e o json podem consumir
+        o buffer direto; o mapeamento é liberado quando o memoryview é liberado.
+
+        Returns:
+            memoryview: Conteúdo do arquivo ou None em caso de erro.
+        """
+        stream = self._open_raw(file_path, file_name)
+        if stream is None:
+            return None
+        codec = self._get_codec(stream)
+        if isinstance(stream, mmap.mmap) and codec == AiCodec.NONE:
+            return memoryview(stream)
+        stream = self._decode_stream(stream, codec)
+        try:
+            return memoryview(stream.read())
+        finally:
+            stream.close()
+
+    # Override
+    def read_text(self, file_path:str, file_name:str, encoding:str="utf-8") -> str:
+        stream = self._open_raw(file_path, file_name)
+        if stream is None:
+            return None
+        codec = self._get_codec(stream)
+        if not isinstance(stream, mmap.mmap) or codec != AiCodec.NONE:
+            stream = self._decode_stream(stream, codec)
+        try:
+            if isinstance(stream, mmap.mmap):
+                # Decodifica direto do mapeamento, sem a cópia intermediária em bytes
+                return str(stream, encoding)
+            return stream.read().decode(encoding)
+        except UnicodeDecodeError:
+            print(f"Erro: Não foi possível decodificar o arquivo usando a codificação '{encoding}'.")
+            return None
+        finally:
+            stream.close()
+
+    def download_fileobj(self, file_path:str, file_name:str, encoding:str="utf-8"):
+        """
+        Lê o arquivo como texto (mesma interface do AiAwsStorage).
+        """
+        return self.read_text(file_path, file_name, encoding)
+
+    # Override
+    def download_file(self, file_path:str, file_name:str, size:int = None):
+        """
+        Copia o arquivo para um arquivo temporário (mesma interface do AiAwsStorage; size não é usado).
+
+        Returns:
+            str: Caminho do arquivo temporário ou None em caso de erro.
+        """
+        start = time.perf_counter()
+        file = self._get_full_path(file_path, file_name)
+        try:
+            base_p, ext = os.path.splitext(file_name)
+            with NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
+                temp_file_path = temp_file.name
+            # copyfile usa cópia no kernel (sendfile) quando disponível
+            shutil.copyfile(file, temp_file_path)
+            self._record("GET", file, os.path.getsize(temp_file_path), start)
+            with open(temp_file_path, "rb") as temp_file:
+                codec = self._get_codec(temp_file)
+            self._decode_file(temp_file_path, codec)
+            return temp_file_path
+        except FileNotFoundError:
+            self._record("GET", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: O arquivo '{file}' não foi encontrado.")
+            return None
+        except Exception as e:
+            self._record("GET", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Ocorreu um erro inesperado durante o download: {e}")
+            return None
+
+    def _save_metadata(self, file_path:str, file_name:str, metadata:dict):
+        """
+        Grava o .metadata do arquivo, no mesmo layout do S3.
+        """
+        metadata_file = self._get_full_path(((file_path + "/") if file_path is not None and file_path != "" else "") + ".metadata",
+                                            file_name + ".metadata")
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(metadata_file), exist_ok=True)
+        content = json.dumps(metadata)
+        with open(metadata_file, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(content)
+        self._record("PUT", metadata_file, len(content.encode('utf-8')), start)
 
     # Override
     def save(self, file_path:str, file_name:str, content:str, metadata:dict = None):
@@ -127,19 +771,32 @@ class AiDiskStorage(AiStorage):
         """
         file = AiUtils.sanitize_file_path(self.host + "/" + self.base_path + "/" + ((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
 
+        start = time.perf_counter()
         try:
-            with open(file, 'w', encoding='utf-8') as arquivo:
-                arquivo.write(content)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            if self.compression != AiCodec.NONE:
+                with open(file, 'wb') as arquivo:
+                    arquivo.write(self._encode_content(content))
+            else:
+                with open(file, 'w', encoding='utf-8') as arquivo:
+                    arquivo.write(content)
+            self._record("PUT", file, os.path.getsize(file), start)
+            if metadata is not None:
+                self._save_metadata(file_path, file_name, metadata)
 
+            self.invalidate_listing()
             print(f"Texto salvo com sucesso em: {file}")
             return True
         except FileNotFoundError:
-            print(f"Erro: O diretório '{path}' não foi encontrado.")
+            self._record("PUT", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: O diretório '{os.path.dirname(file)}' não foi encontrado.")
             return False
         except PermissionError:
-            print(f"Erro: Permissão negada para acessar o diretório '{path}'.")
+            self._record("PUT", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: Permissão negada para acessar o diretório '{os.path.dirname(file)}'.")
             return False
         except Exception as e:
+            self._record("PUT", file, 0, start, AiStorageMetrics.ERROR)
             print(f"Ocorreu um erro inesperado: {e}")
             return False
     
@@ -169,21 +826,35 @@ class AiDiskStorage(AiStorage):
              print(f"Erro: O arquivo de origem e destino são os mesmos ('{local_path}').")
              return False
 
+        start = time.perf_counter()
         try:
-            shutil.copy2(local_path, file)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            if self.compression != AiCodec.NONE:
+                with open(file, 'wb') as target:
+                    AiCodec.compress_file(local_path, target, self.compression, self.compression_level)
+            else:
+                shutil.copy2(local_path, file)
+            self._record("PUT", file, os.path.getsize(file), start)
+            if metadata is not None:
+                self._save_metadata(file_path, file_name, metadata)
+            self.invalidate_listing()
             print(f"Sucesso: Arquivo '{local_path}' duplicado como '{file}'.")
             return True
         except FileNotFoundError:
-            print(f"Erro: O diretório '{path}' não foi encontrado.")
+            self._record("PUT", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: O diretório '{os.path.dirname(file)}' não foi encontrado.")
             return False
         except PermissionError:
-            print(f"Erro: Permissão negada para acessar o diretório '{path}'.")
+            self._record("PUT", file, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: Permissão negada para acessar o diretório '{os.path.dirname(file)}'.")
             return False
         except Exception as e:
+            self._record("PUT", file, 0, start, AiStorageMetrics.ERROR)
             print(f"Ocorreu um erro inesperado: {e}")
             return False
 
-    def list_path(self, path:str, prefix:str="", type:str="") -> list:
+    # Override
+    def _list_path(self, path:str, prefix:str="", type:str="") -> list:
         """
         Lista todos os arquivos e subpastas (prefixos) dentro de uma path.
 
@@ -195,24 +866,70 @@ class AiDiskStorage(AiStorage):
         Returns:
             list : Lista todos os arquivos e subpastas (prefixos) dentro de uma path. 
         """
+        start = time.perf_counter()
         files = []
-        path = AiUtils.sanitize_file_path(self.host + "/" + self.base_path + "/" + ((path) if path is not None and path != "" else ""))
+        path = self._get_local_path(path if path is not None else "")
         try:
             for item in os.listdir(path):
                 full_path = os.path.join(path, item)
                 if type != "PATH" and os.path.isfile(full_path):
-                    files.append({'name': full_path, 'type': "FILE"})
+                    stat = os.stat(full_path)
+                    files.append({'name': full_path, 'type': "FILE", 'size': stat.st_size,
+                                  'last_modified': stat.st_mtime_ns, 'inode': stat.st_ino, 'etag': None})
                 elif type != "FILE" and os.path.isdir(full_path):
                     files.append({'name': full_path, 'type': "PATH"})
             
+            self._record("LIST", path, 0, start)
             return files
         except FileNotFoundError:
+            self._record("LIST", path, 0, start, AiStorageMetrics.ERROR)
             print(f"Erro: O diretório '{path}' não foi encontrado.")
             return None
         except PermissionError:
+            self._record("LIST", path, 0, start, AiStorageMetrics.ERROR)
             print(f"Erro: Permissão negada para acessar o diretório '{path}'.")
             return None
         except Exception as e:
+            self._record("LIST", path, 0, start, AiStorageMetrics.ERROR)
+            print(f"Ocorreu um erro inesperado: {e}")
+            return None
+
+    # Override
+    def _get_list_root(self, path:str) -> str:
+        root = self._get_local_path(path if path is not None else "")
+        return root.rstrip("/") if root != "/" else root
+
+    # Override
+    def _walk(self, root:str) -> list:
+        start = time.perf_counter()
+        entries = []
+        stack = [(root, [])]
+        try:
+            while stack:
+                folder, parts = stack.pop()
+                with os.scandir(folder) as iterator:
+                    for item in iterator:
+                        # DirEntry reaproveita o tipo retornado pelo readdir, sem um stat por entrada
+                        if item.is_dir(follow_symlinks=False):
+                            entries.append((parts + [item.name], {'name': item.path, 'type': "PATH"}))
+                            stack.append((item.path, parts + [item.name]))
+                        elif item.is_file():
+                            stat = item.stat()
+                            entries.append((parts + [item.name], {'name': item.path, 'type': "FILE", 'size': stat.st_size,
+                                                                  'last_modified': stat.st_mtime_ns, 'inode': stat.st_ino,
+                                                                  'etag': None}))
+            self._record("LIST", root, 0, start)
+            return entries
+        except FileNotFoundError:
+            self._record("LIST", root, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: O diretório '{root}' não foi encontrado.")
+            return None
+        except PermissionError:
+            self._record("LIST", root, 0, start, AiStorageMetrics.ERROR)
+            print(f"Erro: Permissão negada para acessar o diretório '{root}'.")
+            return None
+        except Exception as e:
+            self._record("LIST", root, 0, start, AiStorageMetrics.ERROR)
             print(f"Ocorreu um erro inesperado: {e}")
             return None
 
@@ -235,10 +952,170 @@ class AiAwsStorage (AiStorage):
                 host (str): path no disco
                 base_path (str): path2 no disco
                 type (str): AWS
+                max_pool_connections (int, optional): conexões HTTP do cliente. DEFAULT: max(50, max_workers *
+                    maior max_concurrency dos perfis de transferência), pois cada thread do lote pode
+                    executar uma transferência com max_concurrency conexões
+                max_attempts (int, optional): tentativas (retry adaptativo). DEFAULT: 10
+                transfer (dict | list, optional): perfis de transferência do upload_file/download_file.
+                    Cada perfil tem min_size_mb, multipart_threshold_mb, multipart_chunksize_mb,
+                    max_concurrency e use_threads; o perfil com o maior min_size_mb até o tamanho do
+                    objeto é usado. Um dict altera o perfil padrão. DEFAULT: TRANSFER_PROFILES
         """
         super().__init__(config)
+        self.transfer_profiles = AiAwsStorage._get_transfer_profiles(config.get("transfer"))
+        # Pool de conexões dimensionado para as transferências simultâneas do lote e retry adaptativo
+        max_concurrency = max(profile["max_concurrency"] for profile in self.transfer_profiles)
+        client_config = Config(max_pool_connections=config.get("max_pool_connections") or max(50, self.max_workers * max_concurrency),
+                               retries={"max_attempts": config.get("max_attempts") or 10, "mode": "adaptive"})
         # Inicializa o cliente do S3
-        self.aws_client = boto3.client('s3', region_name=("us-east-2" if config["host"] is None else config["host"]))
+        self.aws_client = boto3.client('s3', region_name=("us-east-2" if config["host"] is None else config["host"]),
+                                       config=client_config)
+        if self.metrics is not None:
+            self._register_metrics_events()
+
+    # Perfis padrão: objetos pequenos com partes de 8MB; objetos grandes (zips de branch,
+    # PDFs grandes) com partes maiores e mais conexões simultâneas
+    TRANSFER_PROFILES = [
+        {"min_size_mb": 0, "multipart_threshold_mb": 8, "multipart_chunksize_mb": 8, "max_concurrency": 10, "use_threads": True},
+        {"min_size_mb": 256, "multipart_threshold_mb": 8, "multipart_chunksize_mb": 64, "max_concurrency": 32, "use_threads": True},
+    ]
+
+    @staticmethod
+    def _get_transfer_profiles(transfer) -> list:
+        """
+        Monta os perfis de transferência a partir da configuração, ordenados por min_size_mb.
+        """
+        if transfer is None:
+            profiles = AiAwsStorage.TRANSFER_PROFILES
+        elif isinstance(transfer, dict):
+            profiles = [dict(AiAwsStorage.TRANSFER_PROFILES[0], **transfer)]
+        else:
+            profiles = [dict(AiAwsStorage.TRANSFER_PROFILES[0], **profile) for profile in transfer]
+        return sorted(profiles, key=lambda profile: profile.get("min_size_mb") or 0)
+
+    def get_transfer_config(self, size:int = None) -> TransferConfig:
+        """
+        Retorna o TransferConfig do perfil adequado ao tamanho do objeto (bytes).
+        Sem o tamanho, usa o primeiro perfil.
+        """
+        mb = 1024 * 1024
+        profile = self.transfer_profiles[0]
+        for item in self.transfer_profiles:
+            if size is not None and size >= (item.get("min_size_mb") or 0) * mb:
+                profile = item
+        return TransferConfig(multipart_threshold=int(profile["multipart_threshold_mb"] * mb),
+                              multipart_chunksize=int(profile["multipart_chunksize_mb"] * mb),
+                              max_concurrency=profile["max_concurrency"],
+                              use_threads=profile["use_threads"])
+
+    def _record_transfer(self, operation:str, object_name:str, size:int, start:float):
+        """
+        Registra a vazão de uma transferência completa (UPLOAD/DOWNLOAD, todas as partes) nas métricas;
+        sem métricas configuradas, imprime a vazão (MB/s).
+        """
+        if self.metrics is not None:
+            self._record(operation, object_name, size, start)
+            return
+        elapsed = time.perf_counter() - start
+        mb = size / (1024 * 1024)
+        print(f"{operation} de '{object_name}': {mb:.1f} MB em {elapsed:.2f}s "
+              f"({(mb / elapsed) if elapsed > 0 else 0.0:.1f} MB/s)")
+
+    # Tentativas da gravação condicional do índice de metadata quando outro processo grava ao mesmo tempo
+    INDEX_MAX_ATTEMPTS = 5
+
+    # Operações do S3 registradas com o nome usado nas métricas. O after-call do botocore é
+    # emitido ao receber os cabeçalhos, antes da leitura do corpo, então a duração do GetObject
+    # é o tempo até o primeiro byte (GET_TTFB) e não inclui o download do conteúdo
+    METRIC_OPERATIONS = {"GetObject": "GET_TTFB", "PutObject": "PUT", "ListObjectsV2": "LIST", "HeadObject": "HEAD"}
+
+    def _register_metrics_events(self):
+        """
+        Registra os eventos do botocore que medem cada requisição ao S3 (inclusive as feitas
+        pelo upload_file/download_file e pelos paginators). O contexto da requisição guarda o
+        início e a chave entre os eventos.
+        """
+        events = self.aws_client.meta.events
+        events.register("before-parameter-build.s3", self._on_before_parameter_build)
+        events.register("before-call.s3", self._on_before_call)
+        events.register("after-call.s3", self._on_after_call)
+        events.register("after-call-error.s3", self._on_after_call_error)
+
+    def _on_before_parameter_build(self, params, model, context, **kwargs):
+        context["ai_metrics_start"] = time.perf_counter()
+        context["ai_metrics_key"] = params.get("Key") or params.get("Prefix") or params.get("Bucket")
+        # O after-call-error não recebe o model: a operação fica no contexto
+        context["ai_metrics_operation"] = AiAwsStorage.METRIC_OPERATIONS.get(model.name, model.name)
+
+    def _on_before_call(self, params, context, **kwargs):
+        # Bytes enviados: Content-Length quando informado, senão o tamanho do corpo
+        length = params.get("headers", {}).get("Content-Length")
+        body = params.get("body")
+        if length is None and body is not None:
+            length = AiAwsStorage._get_body_size(body)
+        context["ai_metrics_bytes"] = int(length or 0)
+
+    @staticmethod
+    def _get_body_size(body) -> int:
+        """
+        Tamanho do corpo da requisição: bytes, objetos com len (ex: ReadFileChunk das partes do
+        upload_file) ou streams, medidos com seek/tell a partir da posição atual.
+        """
+        if isinstance(body, str):
+            return len(body.encode("utf-8"))
+        if isinstance(body, (bytes, bytearray)):
+            return len(body)
+        try:
+            return len(body)
+        except TypeError:
+            pass
+        try:
+            position = body.tell()
+            body.seek(0, os.SEEK_END)
+            size = body.tell() - position
+            body.seek(position)
+            return size
+        except (AttributeError, OSError, ValueError):
+            return 0
+
+    def _on_after_call(self, http_response, parsed, model, context, **kwargs):
+        operation = AiAwsStorage.METRIC_OPERATIONS.get(model.name, model.name)
+        status = http_response.status_code if http_response is not None else 0
+        if status == 304:
+            outcome = AiStorageMetrics.NOT_MODIFIED
+        elif status >= 400:
+            outcome = AiStorageMetrics.ERROR
+        else:
+            outcome = AiStorageMetrics.OK
+        size = context.get("ai_metrics_bytes") or 0
+        if operation == "GET_TTFB" and outcome == AiStorageMetrics.OK:
+            size = (parsed or {}).get("ContentLength") or 0
+        self._record(operation, context.get("ai_metrics_key"), size, context.get("ai_metrics_start"), outcome)
+
+    def _on_after_call_error(self, context, **kwargs):
+        # Emitido pelo botocore somente com exception e context (erros de transporte, ex: timeout)
+        self._record(context.get("ai_metrics_operation") or "UNKNOWN", context.get("ai_metrics_key"), 0,
+                     context.get("ai_metrics_start"), AiStorageMetrics.ERROR)
+
+    # Override
+    def get_uri(self, path:str) -> str:
+        return "s3://" + AiUtils.sanitize_file_path(self.base_path + "/" + path)
+
+    @staticmethod
+    def _get_object_codec(response:dict) -> str:
+        """
+        Codec do objeto pela resposta do get_object/head_object (metadata ai-codec ou Content-Encoding).
+        """
+        return AiCodec.from_metadata(response.get("Metadata"), response.get("ContentEncoding"))
+
+    def _get_codec_args(self) -> dict:
+        """
+        Content-Encoding e metadata do objeto com o codec usado na compressão.
+        """
+        if self.compression == AiCodec.NONE:
+            return {}
+        return {"ContentEncoding": AiCodec.CONTENT_ENCODING[self.compression],
+                "Metadata": {"ai-codec": self.compression}}
         
     # Override
     def save(self, file_path:str, file_name:str, content:str, metadata:dict = None):
@@ -254,11 +1131,13 @@ class AiAwsStorage (AiStorage):
         """
         object_name = AiUtils.sanitize_file_path(((file_path + "/") if (file_path is not None and file_path != "") else "") + file_name)
         try:
-            self.aws_client.put_object(Body=content.encode('utf-8'), Bucket=self.base_path, Key=object_name)
+            self.aws_client.put_object(Body=self._encode_content(content), Bucket=self.base_path, Key=object_name,
+                                       **self._get_codec_args())
             if (metadata is not None):
                 metadata_json = json.dumps(metadata)
                 metadata_name = AiUtils.sanitize_file_path(((file_path + "/") if (file_path is not None and file_path != "") else "") + "/.metadata/" + file_name + ".metadata")
                 self.aws_client.put_object(Body=metadata_json.encode('utf-8'), Bucket=self.base_path, Key=metadata_name)
+            self.invalidate_listing()
             print(f"Arquivo '{object_name}' subido com sucesso para o bucket '{self.base_path}'.")
             return True
         except botocore.exceptions.NoCredentialsError:
@@ -286,6 +1165,45 @@ class AiAwsStorage (AiStorage):
             print(f"Ocorreu um erro inesperado durante o upload: {e}")
             return False
     
+    # Override
+    def save_many(self, items:list) -> list:
+        """
+        Salva vários conteúdos no S3 em paralelo.
+
+        O conteúdo e o .metadata de cada item são enviados como PUTs independentes
+        no pool compartilhado, então as duas escritas acontecem em paralelo.
+        """
+        executor = self._get_executor()
+        pending = []
+        for item in items:
+            folder = ((item["file_path"] + "/") if (item.get("file_path") is not None and item.get("file_path") != "") else "")
+            object_name = AiUtils.sanitize_file_path(folder + item["file_name"])
+            futures = [executor.submit(self.aws_client.put_object, Body=self._encode_content(item["content"]),
+                                       Bucket=self.base_path, Key=object_name, **self._get_codec_args())]
+            if item.get("metadata") is not None and self.metadata_layout != AiStorage.METADATA_INDEX:
+                metadata_name = AiUtils.sanitize_file_path(folder + "/.metadata/" + item["file_name"] + ".metadata")
+                futures.append(executor.submit(self.aws_client.put_object, Body=json.dumps(item["metadata"]).encode('utf-8'),
+                                               Bucket=self.base_path, Key=metadata_name))
+            pending.append((item, futures))
+
+        results = []
+        for item, futures in pending:
+            error = None
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    error = str(e)
+            results.append({"file_path": item.get("file_path"), "file_name": item["file_name"],
+                            "success": error is None, "error": error})
+
+        self._save_metadata_indexes(items, results)
+        self.invalidate_listing()
+
+        total_error = sum(1 for result in results if not result["success"])
+        print(f"{len(results) - total_error} arquivos subidos para o bucket '{self.base_path}' ({total_error} com erro).")
+        return results
+
     # Override
     def save_by_file(self, file_path:str, file_name:str, local_path:str, metadata:dict = None):
         """
@@ -311,13 +1229,32 @@ class AiAwsStorage (AiStorage):
 
             # O método upload_file gerencia arquivos grandes e multipart upload automaticamente.
             # Argumentos: CaminhoLocal, NomeBucket, ChaveObjetoS3
-            response = self.aws_client.upload_file(local_path, Bucket=self.base_path, Key=object_name)
+            if self.compression != AiCodec.NONE:
+                # Comprime para um arquivo temporário e envia com o Content-Encoding do codec
+                with NamedTemporaryFile(delete=False) as temp_file:
+                    AiCodec.compress_file(local_path, temp_file, self.compression, self.compression_level)
+                try:
+                    size = os.path.getsize(temp_file.name)
+                    # A duração do UPLOAD (métricas) não inclui a compressão
+                    start = time.perf_counter()
+                    response = self.aws_client.upload_file(temp_file.name, Bucket=self.base_path, Key=object_name,
+                                                           ExtraArgs=self._get_codec_args(),
+                                                           Config=self.get_transfer_config(size))
+                finally:
+                    os.remove(temp_file.name)
+            else:
+                size = os.path.getsize(local_path)
+                start = time.perf_counter()
+                response = self.aws_client.upload_file(local_path, Bucket=self.base_path, Key=object_name,
+                                                       Config=self.get_transfer_config(size))
+            self._record_transfer("UPLOAD", object_name, size, start)
 
             if (metadata is not None):
                 metadata_json = json.dumps(metadata)
                 metadata_name = AiUtils.sanitize_file_path(((file_path + "/") if (file_path is not None and file_path != "") else "") + "/.metadata/" + file_name + ".metadata")
                 self.aws_client.put_object(Body=metadata_json.encode('utf-8'), Bucket=self.base_path, Key=metadata_name)
 
+            self.invalidate_listing()
             # Se o método não levantar exceção, o upload foi (provavelmente) bem-sucedido.
             # A resposta para upload_file é None em caso de sucesso.
             print("Upload concluído com sucesso!")
@@ -352,7 +1289,8 @@ class AiAwsStorage (AiStorage):
             print(f"Ocorreu um erro inesperado durante o upload: {e}")
             return False
         
-    def list_path(self, path:str, prefix:str="", type:str="") -> list:
+    # Override
+    def _list_path(self, path:str, prefix:str="", type:str="") -> list:
         """
         Lista todos os arquivos e subpastas (prefixos) dentro de uma path.
 
@@ -375,7 +1313,9 @@ class AiAwsStorage (AiStorage):
             for page in pages:
                 if type != "PATH" and 'Contents' in page:
                     for obj in page['Contents']:
-                        files.append({'name': obj['Key'], 'type': "FILE"})
+                        files.append({'name': obj['Key'], 'type': "FILE", 'size': obj.get('Size'),
+                                      'last_modified': obj['LastModified'].isoformat() if obj.get('LastModified') else None,
+                                      'etag': obj.get('ETag', '').strip('"')})
                 if type != "FILE" and 'CommonPrefixes' in page:
                     for prefix_data in page['CommonPrefixes']:
                         files.append({'name': prefix_data['Prefix'].rstrip('/'), "type": "PATH"})
@@ -406,14 +1346,57 @@ class AiAwsStorage (AiStorage):
             print(f"Ocorreu um erro inesperado durante a execução do v: {e}")
             return None
 
+    # Override
+    def _get_list_root(self, path:str) -> str:
+        return AiUtils.sanitize_file_path(path if path is not None else "").strip("/")
+
+    # Override
+    def _walk(self, root:str) -> list:
+        """
+        Listagem única e sem delimitador de todo o prefixo (uma requisição a cada 1000 objetos).
+        """
+        entries = []
+        p = (root + "/") if root != "" else ""
+        try:
+            paginator = self.aws_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.base_path, Prefix=p):
+                for obj in page.get('Contents', []):
+                    relative = obj['Key'][len(p):]
+                    if relative == "":
+                        continue
+                    parts = relative.rstrip("/").split("/")
+                    if obj['Key'].endswith("/"):
+                        # Marcador de pasta criado pelo console
+                        entries.append((parts, {'name': obj['Key'].rstrip("/"), 'type': "PATH"}))
+                        continue
+                    entries.append((parts, {'name': obj['Key'], 'type': "FILE", 'size': obj.get('Size'),
+                                            'last_modified': obj['LastModified'].isoformat() if obj.get('LastModified') else None,
+                                            'etag': obj.get('ETag', '').strip('"')}))
+            return entries
+        except botocore.exceptions.ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code")
+            error_message = e.response.get("Error", {}).get("Message")
+            print(f"Erro ao acessar o bucket: {error_code} - {error_message}: {self.base_path}/{p}")
+            return None
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado durante a listagem de '{p}': {e}")
+            return None
+
 
-    def download_file(self, file_path:str, file_name:str):
+    def download_file(self, file_path:str, file_name:str, size:int = None):
         """
         Download file para um arquivo temporário
 
+        Com o tamanho informado, um objeto abaixo do multipart_threshold do perfil é baixado com um
+        único GET (o codec vem da própria resposta) e os maiores são baixados pelo s3transfer, que
+        recebe o tamanho e não faz o próprio HEAD. O HEAD deste método só acontece sem o tamanho ou,
+        em um objeto multipart, quando o storage grava com compressão (decompress e compression
+        diferente de NONE), para obter o codec; nos demais casos o objeto é tratado como sem codec.
+
         Args:
             file_path (str): O caminho para o arquivo a ser criado/modificado.
             file_name (str): O nome do arquivo a ser criado/modificado.
+            size (int, optional): Tamanho do objeto (bytes) já conhecido (ex: do list_path).
 
         Returns:
             str: Caminho do arquivo temporário que foi feito download do S3
@@ -426,7 +1409,27 @@ class AiAwsStorage (AiStorage):
             with NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
                 temp_file_path = temp_file.name
 
-            self.aws_client.download_file(self.base_path, object_name, temp_file_path)
+            start = time.perf_counter()
+            codec = AiCodec.NONE
+            transfer_config = self.get_transfer_config(size)
+            if size is not None and size < transfer_config.multipart_threshold:
+                # Objeto pequeno: um único GET, com o codec gravado no objeto na própria resposta
+                response = self.aws_client.get_object(Bucket=self.base_path, Key=object_name)
+                with open(temp_file_path, "wb") as temp_file:
+                    shutil.copyfileobj(response["Body"], temp_file)
+                codec = AiAwsStorage._get_object_codec(response)
+            else:
+                # O HEAD traz o tamanho (escolha do perfil) e o codec gravado no objeto
+                if size is None or (self.decompress and self.compression != AiCodec.NONE):
+                    head = self.aws_client.head_object(Bucket=self.base_path, Key=object_name)
+                    size = head["ContentLength"]
+                    codec = AiAwsStorage._get_object_codec(head)
+                    transfer_config = self.get_transfer_config(size)
+                with create_transfer_manager(self.aws_client, transfer_config) as manager:
+                    manager.download(self.base_path, object_name, temp_file_path,
+                                     subscribers=[_AiTransferSizeSubscriber(size)]).result()
+            self._record_transfer("DOWNLOAD", object_name, os.path.getsize(temp_file_path), start)
+            self._decode_file(temp_file_path, codec)
             return temp_file_path
 
         except botocore.exceptions.NoCredentialsError:
@@ -454,6 +1457,134 @@ class AiAwsStorage (AiStorage):
             print(f"Ocorreu um erro inesperado durante o download: {e}")
             return None
 
+    # Override
+    def exists(self, file_path:str, file_name:str) -> bool:
+        object_name = AiUtils.sanitize_file_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
+        try:
+            self.aws_client.head_object(Bucket=self.base_path, Key=object_name)
+            return True
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            # Sem s3:ListBucket o S3 responde 403 também para objetos inexistentes
+            print(f"Erro ao verificar o objeto '{object_name}' (verifique as permissões s3:GetObject/s3:ListBucket): {e}")
+            raise
+
+    # Override
+    def load_metadata_index(self, file_path:str) -> dict:
+        """
+        Carrega o índice de metadata da pasta com um único GET (404 = pasta sem índice). Outros
+        erros (ex: 403 AccessDenied) são propagados, em vez de tratados como índice ausente.
+        """
+        object_name = AiUtils.sanitize_file_path(AiStorage._get_metadata_folder(file_path) + "/" + AiStorage.METADATA_INDEX_NAME)
+        try:
+            response = self.aws_client.get_object(Bucket=self.base_path, Key=object_name)
+        except botocore.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return {}
+            print(f"Erro ao ler o índice de metadata '{object_name}': {e}")
+            raise
+
+        stream = self._decode_stream(response["Body"], AiAwsStorage._get_object_codec(response))
+        try:
+            return AiStorage._parse_metadata_index(stream.read().decode("utf-8"))
+        finally:
+            stream.close()
+
+    # Override
+    def _update_metadata_index(self, file_path:str, entries:dict) -> bool:
+        """
+        Atualiza o índice com gravação condicional do S3: o PUT só é aceito se o índice ainda
+        estiver na versão lida (If-Match com o ETag, ou If-None-Match quando ainda não existe).
+        Se outro processo gravou antes, o índice é relido e a mescla repetida.
+        """
+        object_name = AiUtils.sanitize_file_path(AiStorage._get_metadata_folder(file_path) + "/" + AiStorage.METADATA_INDEX_NAME)
+        for _ in range(AiAwsStorage.INDEX_MAX_ATTEMPTS):
+            try:
+                response = self.aws_client.get_object(Bucket=self.base_path, Key=object_name)
+                stream = self._decode_stream(response["Body"], AiAwsStorage._get_object_codec(response))
+                try:
+                    index = AiStorage._parse_metadata_index(stream.read().decode("utf-8"))
+                finally:
+                    stream.close()
+                condition = {"IfMatch": response["ETag"]}
+            except botocore.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                    print(f"Erro ao ler o índice de metadata '{object_name}': {e}")
+                    return False
+                index = {}
+                condition = {"IfNoneMatch": "*"}
+
+            index.update(entries)
+            try:
+                self.aws_client.put_object(Body=self._encode_content(AiStorage._format_metadata_index(index)),
+                                           Bucket=self.base_path, Key=object_name, **self._get_codec_args(), **condition)
+                self.invalidate_listing()
+                return True
+            except botocore.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("PreconditionFailed", "ConditionalRequestConflict", "412", "409"):
+                    print(f"Erro ao gravar o índice de metadata '{object_name}': {e}")
+                    return False
+                print(f"Índice de metadata '{object_name}' alterado por outro processo, repetindo a mescla.")
+
+        print(f"Erro: o índice de metadata '{object_name}' não foi gravado após {AiAwsStorage.INDEX_MAX_ATTEMPTS} tentativas.")
+        return False
+
+    # Override
+    def open_stream(self, file_path:str, file_name:str, seekable:bool = False):
+        """
+        Abre o objeto do S3 em streaming.
+
+        Sem seekable retorna o StreamingBody do get_object. Com seekable retorna um
+        leitor com buffer que busca cada bloco com GET Range, para extratores que
+        precisam de seek (ex: pdfminer).
+        """
+        object_name = AiUtils.sanitize_file_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
+        try:
+            if seekable:
+                # O HEAD traz o tamanho do leitor e o codec do objeto
+                head = self.aws_client.head_object(Bucket=self.base_path, Key=object_name)
+                reader = AiS3RangeReader(self.aws_client, self.base_path, object_name, head["ContentLength"])
+                return self._decode_stream(io.BufferedReader(reader, buffer_size=AiS3RangeReader.BLOCK_SIZE),
+                                           AiAwsStorage._get_object_codec(head), seekable)
+            response = self.aws_client.get_object(Bucket=self.base_path, Key=object_name)
+            return self._decode_stream(response["Body"], AiAwsStorage._get_object_codec(response))
+        except botocore.exceptions.NoCredentialsError:
+            print("Erro: Credenciais AWS não encontradas.")
+            return None
+        except botocore.exceptions.ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code")
+            error_message = e.response.get("Error", {}).get("Message")
+            print(f"Erro ao acessar o bucket: {error_code} - {error_message}: {self.base_path}/{object_name}")
+            return None
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado durante o download: {e}")
+            return None
+
+    # Override
+    def open_stream_if_changed(self, file_path:str, file_name:str, etag:str = None) -> dict:
+        """
+        GET condicional (If-None-Match): quando o ETag não mudou o S3 responde 304 sem corpo.
+        """
+        object_name = AiUtils.sanitize_file_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
+        try:
+            params = {"Bucket": self.base_path, "Key": object_name}
+            if etag is not None:
+                params["IfNoneMatch"] = '"' + etag.strip('"') + '"'
+            response = self.aws_client.get_object(**params)
+            return {"modified": True, "etag": response.get("ETag", "").strip('"') or None, "stream": response["Body"],
+                    "codec": AiAwsStorage._get_object_codec(response)}
+        except botocore.exceptions.ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code")
+            if error_code in ("304", "NotModified") or e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 304:
+                return {"modified": False, "etag": etag, "stream": None}
+            error_message = e.response.get("Error", {}).get("Message")
+            print(f"Erro ao acessar o bucket: {error_code} - {error_message}: {self.base_path}/{object_name}")
+            return None
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado durante o download: {e}")
+            return None
+
     def download_fileobj(self, file_path:str, file_name:str, encoding:str="utf-8"):
         """
         Download file para um arquivo para text
@@ -468,14 +1599,13 @@ class AiAwsStorage (AiStorage):
         object_name = AiUtils.sanitize_file_path(((file_path + "/") if file_path is not None and file_path != "" else "") + file_name)
        
         try:
-            in_memory_file = io.BytesIO()
-            
-            self.aws_client.download_fileobj(Bucket=self.base_path, Key=object_name, Fileobj=in_memory_file)
-            in_memory_file.seek(0)
-            file_in_byte = in_memory_file.read()
-            text = file_in_byte.decode(encoding)
-
-            return text
+            # Decodifica direto do StreamingBody, sem cópia intermediária em BytesIO
+            response = self.aws_client.get_object(Bucket=self.base_path, Key=object_name)
+            body = self._decode_stream(response["Body"], AiAwsStorage._get_object_codec(response))
+            try:
+                return codecs.getreader(encoding)(body).read()
+            finally:
+                body.close()
 
         except botocore.exceptions.NoCredentialsError:
             print("Erro: Credenciais AWS não encontradas.")
@@ -506,4 +1636,72 @@ class AiAwsStorage (AiStorage):
             # Captura outros erros inesperados
             print(f"Ocorreu um erro inesperado durante o download: {e}")
             return None
-       
\ No newline at end of file
+
+
+class _AiTransferSizeSubscriber(BaseSubscriber):
+    """
+    Informa ao s3transfer o tamanho já conhecido do objeto, evitando o HEAD interno do download.
+    """
+    def __init__(self, size:int):
+        self.size = size
+
+    def on_queued(self, future, **kwargs):
+        future.meta.provide_transfer_size(self.size)
+
+
+###################################
+# CLASS AiS3RangeReader
+# Author: Leonaro Cabral
+# Date: 2025-04-11
+###################################
+
+class AiS3RangeReader(io.RawIOBase):
+    """
+    Leitor com seek sobre um objeto do S3, que busca os bytes com GET Range.
+    """
+    BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, aws_client, bucket:str, key:str, size:int = None):
+        super().__init__()
+        self.aws_client = aws_client
+        self.bucket = bucket
+        self.key = key
+        self.size = size if size is not None else aws_client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset:int, whence:int = io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        self.position = max(0, self.position)
+        return self.position
+
+    def readall(self):
+        if self.position >= self.size:
+            return b""
+        data = self.aws_client.get_object(Bucket=self.bucket, Key=self.key,
+                                          Range=f"bytes={self.position}-{self.size - 1}")["Body"].read()
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+        end = min(self.position + len(buffer), self.size) - 1
+        data = self.aws_client.get_object(Bucket=self.bucket, Key=self.key,
+                                          Range=f"bytes={self.position}-{end}")["Body"].read()
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
@@ -0,0 +1,196 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+###################################
+# CLASS AiStorageMetrics
+# Author: Airton Lira Junior
+# Date: 2025-05-23
+###################################
+
+class AiStorageMetrics:
+    """
+    Métricas das operações de I/O do storage.
+
+    Cada operação registra o tipo (GET, PUT, LIST, HEAD...), a chave, os bytes,
+    a duração e o resultado. Os valores são agregados em memória por operação e
+    por tipo de objeto (conteúdo ou .metadata), com histograma de latência em
+    buckets fixos. O callback opcional recebe cada evento (ex: envio para um
+    sistema de métricas) e o resumo pode ser exportado em JSON ao final da execução.
+    """
+    OK = "OK"
+    ERROR = "ERROR"
+    NOT_MODIFIED = "NOT_MODIFIED"
+
+    CONTENT = "content"
+    METADATA = "metadata"
+
+    # Transferências completas (todas as partes de um upload_file/download_file): as requisições e
+    # os bytes já são contados pelas operações de cada requisição, então ficam fora dos totais e
+    # reportam a vazão (MB/s)
+    TRANSFER_OPERATIONS = ("UPLOAD", "DOWNLOAD")
+
+    # Limites superiores dos buckets do histograma (ms); o último bucket é o restante
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self, callback=None):
+        """
+        Inicializa a classe AiStorageMetrics.
+
+        Args:
+            callback (callable, optional): Função chamada com o dict de cada evento
+                (operation, key, kind, bytes, duration_ms, outcome).
+        """
+        self.callback = callback
+        self._lock = threading.Lock()
+        self.reset()
+
+    @staticmethod
+    def get_kind(key: str) -> str:
+        """
+        Classifica a chave em conteúdo ou .metadata (sidecar e índice).
+        """
+        return AiStorageMetrics.METADATA if key is not None and "/.metadata/" in ("/" + key) else AiStorageMetrics.CONTENT
+
+    def reset(self):
+        with self._lock:
+            self._started = time.time()
+            self._operations = {}
+
+    def record(self, operation: str, key: str = None, bytes: int = 0, duration: float = 0.0, outcome: str = OK):
+        """
+        Registra uma operação.
+
+        Args:
+            operation (str): Tipo da operação (GET, PUT, LIST, HEAD...).
+            key (str, optional): Chave ou caminho do objeto.
+            bytes (int, optional): Bytes transferidos.
+            duration (float, optional): Duração em segundos.
+            outcome (str, optional): OK, ERROR ou NOT_MODIFIED.
+        """
+        kind = AiStorageMetrics.get_kind(key)
+        duration_ms = duration * 1000.0
+        bucket = bisect.bisect_left(AiStorageMetrics.BUCKETS_MS, duration_ms)
+
+        with self._lock:
+            stats = self._operations.setdefault((operation, kind), {
+                "count": 0, "errors": 0, "not_modified": 0, "bytes": 0, "duration_ms": 0.0,
+                "min_ms": None, "max_ms": 0.0, "histogram": [0] * (len(AiStorageMetrics.BUCKETS_MS) + 1)})
+            stats["count"] += 1
+            stats["errors"] += 1 if outcome == AiStorageMetrics.ERROR else 0
+            stats["not_modified"] += 1 if outcome == AiStorageMetrics.NOT_MODIFIED else 0
+            stats["bytes"] += bytes or 0
+            stats["duration_ms"] += duration_ms
+            stats["min_ms"] = duration_ms if stats["min_ms"] is None else min(stats["min_ms"], duration_ms)
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["histogram"][bucket] += 1
+
+        if self.callback is not None:
+            try:
+                self.callback({"operation": operation, "key": key, "kind": kind, "bytes": bytes or 0,
+                               "duration_ms": duration_ms, "outcome": outcome})
+            except Exception as e:
+                print(f"Erro no callback de métricas do storage: {e}")
+
+    @contextmanager
+    def track(self, operation: str, key: str = None):
+        """
+        Mede a duração do bloco e registra a operação ao final; exceções são registradas como ERROR.
+
+        Yields:
+            dict: Preencher bytes e/ou outcome dentro do bloco.
+        """
+        event = {"bytes": 0, "outcome": AiStorageMetrics.OK}
+        start = time.perf_counter()
+        try:
+            yield event
+        except Exception:
+            event["outcome"] = AiStorageMetrics.ERROR
+            raise
+        finally:
+            self.record(operation, key, event["bytes"], time.perf_counter() - start, event["outcome"])
+
+    @staticmethod
+    def _percentile(histogram: list, count: int, percentile: float) -> float:
+        """
+        Percentil aproximado pelo limite superior do bucket.
+        """
+        if count == 0:
+            return 0.0
+        target = count * percentile
+        total = 0
+        for index, value in enumerate(histogram):
+            total += value
+            if total >= target:
+                return float(AiStorageMetrics.BUCKETS_MS[index]) if index < len(AiStorageMetrics.BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def get_summary(self) -> dict:
+        """
+        Retorna o resumo das métricas.
+
+        Returns:
+            dict: elapsed_s, totals (requests, errors, bytes; sem as TRANSFER_OPERATIONS) e operations
+                (lista por operação e tipo de objeto com count, bytes, latência média/mín/máx, p50/p95/p99,
+                histograma e, nas TRANSFER_OPERATIONS, mb_per_s = bytes / duração total).
+        """
+        with self._lock:
+            operations = {key: dict(value, histogram=list(value["histogram"])) for key, value in self._operations.items()}
+            elapsed = time.time() - self._started
+
+        result = []
+        for (operation, kind), stats in sorted(operations.items()):
+            count = stats["count"]
+            item = {
+                "operation": operation,
+                "kind": kind,
+                "count": count,
+                "errors": stats["errors"],
+                "not_modified": stats["not_modified"],
+                "bytes": stats["bytes"],
+                "avg_ms": stats["duration_ms"] / count if count > 0 else 0.0,
+                "min_ms": stats["min_ms"] or 0.0,
+                "max_ms": stats["max_ms"],
+                "p50_ms": AiStorageMetrics._percentile(stats["histogram"], count, 0.50),
+                "p95_ms": AiStorageMetrics._percentile(stats["histogram"], count, 0.95),
+                "p99_ms": AiStorageMetrics._percentile(stats["histogram"], count, 0.99),
+                "histogram": {("<=" + str(bound) + "ms") if i < len(AiStorageMetrics.BUCKETS_MS) else (">" + str(AiStorageMetrics.BUCKETS_MS[-1]) + "ms"): value
+                              for i, (bound, value) in enumerate(zip(AiStorageMetrics.BUCKETS_MS + (None,), stats["histogram"])) if value > 0}
+            }
+            if operation in AiStorageMetrics.TRANSFER_OPERATIONS:
+                seconds = stats["duration_ms"] / 1000.0
+                item["mb_per_s"] = (stats["bytes"] / (1024 * 1024)) / seconds if seconds > 0 else 0.0
+            result.append(item)
+
+        requests = [item for item in result if item["operation"] not in AiStorageMetrics.TRANSFER_OPERATIONS]
+        return {"elapsed_s": elapsed,
+                "totals": {"requests": sum(item["count"] for item in requests),
+                           "errors": sum(item["errors"] for item in requests),
+                           "bytes": sum(item["bytes"] for item in requests)},
+                "operations": result}
+
+    def to_json(self, path: str = None) -> str:
+        """
+        Exporta o resumo em JSON (e grava no arquivo local, quando informado).
+        """
+        content = json.dumps(self.get_summary(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(content)
+        return content
+
+    def print_summary(self):
+        summary = self.get_summary()
+        totals = summary["totals"]
+        print(f"Métricas do storage: {totals['requests']} requisições, {totals['errors']} erros, "
+              f"{totals['bytes']} bytes em {summary['elapsed_s']:.1f}s")
+        for item in summary["operations"]:
+            line = (f"  {item['operation']:<8} {item['kind']:<8} count={item['count']} bytes={item['bytes']} "
+                    f"avg={item['avg_ms']:.1f}ms p50={item['p50_ms']:.0f}ms p95={item['p95_ms']:.0f}ms "
+                    f"max={item['max_ms']:.1f}ms errors={item['errors']}")
+            if "mb_per_s" in item:
+                line += f" throughput={item['mb_per_s']:.1f}MB/s"
+            print(line)
@@ -15,6 +15,12 @@ setup(
             "boto3>=1.38.10",
             "botocore>=1.38.10"
         ],
+        "aws-async": [
+            "aiobotocore>=2.22.0"
+        ],
+        "compression": [
+            "zstandard>=0.23.0"
+        ],
         "text-processing": [
             "beautifulsoup4>=4.13.4",
             "lxml>=5.4.0",
@@ -39,7 +45,8 @@ setup(
             "databricks_sdk>=0.52.0",
             "databricks_vectorsearch>=0.56",
             "pyspark>=3.5.5",
-            "pandas>=2.2.3"
+            "pandas>=2.2.3",
+            "pyarrow>=14.0.0"
         ],
         "ml": [
             "mlflow_skinny>=2.22.0",
@@ -63,7 +70,8 @@ setup(
             "botocore>=1.38.10",
             "databricks_sdk>=0.52.0",
             "databricks_vectorsearch>=0.56",
-            "pyspark>=3.5.5"
+            "pyspark>=3.5.5",
+            "pyarrow>=14.0.0"
         ]
     }
 )